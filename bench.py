@@ -0,0 +1,1964 @@
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from scheduler import (DAY_SECONDS, FINISHED_HOLD_MS, JUMP_TOLERANCE_MS, MAX_SLEEP_MS, CountdownQueue,
+                       SimulatedClock, TickScheduler, seconds_remaining, simulate)
+
+
+def qt_app():
+    # Offscreen QApplication with settings redirected to a scratch directory
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtCore import QSettings
+    from PyQt5.QtWidgets import QApplication
+    QSettings.setPath(QSettings.NativeFormat, QSettings.UserScope, tempfile.mkdtemp())
+    return QApplication.instance() or QApplication(sys.argv[:1])
+
+
+def run_countdown(window, remaining_s, duration_s):
+    # Replays `duration_s` of countdown on a simulated clock, waking the
+    # window exactly when its scheduler asks to
+    clock = SimulatedClock(window.config.target_time.toMSecsSinceEpoch() - remaining_s * 1000)
+    window.scheduler.use_clock(clock)
+    window.start_countdown()
+    end = clock.now_ms + duration_s * 1000
+    ticks = 0
+    while True:
+        delay = window.scheduler.deadline_ms
+        if delay is None or delay > end:
+            break
+        clock.now_ms = delay
+        window.update_countdown()
+        ticks += 1
+    return ticks
+
+
+def bench_scheduler(args):
+    # Simulated days of countdown with a timer that fires late or early
+    result = simulate(args.days * DAY_SECONDS * 1000, start_ms=123,
+                      late_ms=args.late_ms, early_ms=args.early_ms,
+                      adaptive=args.adaptive, seed=args.seed)
+    print(json.dumps(result, indent=2))
+    return result["skipped"] == 0 and result["duplicated"] == 0
+
+
+def bench_layout(args):
+    # Layout passes per hour of countdown in the HH:MM:SS and day views
+    app = qt_app()
+    from countdown_window import CountdownWindow
+    window = CountdownWindow()
+    window.show()
+    app.processEvents()
+    ok = True
+    for view, remaining in (("clock", 2 * 3600), ("day", 40 * DAY_SECONDS)):
+        window.config.adaptive_tick = args.adaptive
+        passes = window.layout_passes
+        start = time.perf_counter()
+        ticks = run_countdown(window, remaining, args.hours * 3600)
+        elapsed = time.perf_counter() - start
+        passes = window.layout_passes - passes
+        print(json.dumps({
+            "view": view,
+            "hours": args.hours,
+            "ticks": ticks,
+            "layout_passes": passes,
+            "us_per_tick": round(elapsed / max(ticks, 1) * 1e6, 1),
+        }))
+        ok = ok and passes <= args.max_passes
+    return ok
+
+
+def bench_paint(args):
+    # Per-tick paint cost of the countdown label in the HH:MM:SS view
+    app = qt_app()
+    from countdown_window import CountdownWindow
+    window = CountdownWindow()
+    window.show()
+    app.processEvents()
+    label = window.countdown_label
+
+    clock = SimulatedClock(window.config.target_time.toMSecsSinceEpoch() - 2 * 3600 * 1000)
+    window.scheduler.use_clock(clock)
+    window.start_countdown()
+    app.processEvents()
+    paints, paint_time = label.paint_count, label.paint_time
+    for _ in range(args.ticks):
+        clock.now_ms = window.scheduler.deadline_ms
+        window.update_countdown()
+        if args.full:
+            label.update()
+        app.processEvents()
+    paints = label.paint_count - paints
+    paint_time = label.paint_time - paint_time
+    print(json.dumps({
+        "ticks": args.ticks,
+        "full_repaint": args.full,
+        "paints": paints,
+        "us_per_tick": round(paint_time / args.ticks * 1e6, 1),
+    }))
+    return True
+
+
+def bench_multi(args):
+    # Per-wakeup cost of one shared queue as the number of mostly idle
+    # (day view) countdowns grows while a fixed few tick every second
+    rng = random.Random(0)
+    results = []
+    for total in args.targets:
+        clock = SimulatedClock(0)
+        queue = CountdownQueue(clock)
+        for key in range(total):
+            if key < args.active:
+                target_s = rng.randint(2 * 3600, 20 * 3600)
+            else:
+                target_s = rng.randint(2 * DAY_SECONDS, 365 * DAY_SECONDS)
+            queue.add(key, target_s * 1000)
+
+        wakeups = 0
+        changes = 0
+        start = time.perf_counter()
+        while clock.now_ms < args.seconds * 1000:
+            clock.now_ms = queue.next_deadline_ms()
+            changes += len(queue.advance())
+            wakeups += 1
+        elapsed = time.perf_counter() - start
+        results.append({
+            "targets": total,
+            "wakeups": wakeups,
+            "changes": changes,
+            "us_per_wakeup": round(elapsed / wakeups * 1e6, 2),
+        })
+        print(json.dumps(results[-1]))
+    # Flat means the largest queue costs at most `--max-ratio` times the smallest
+    costs = [r["us_per_wakeup"] for r in results]
+    return max(costs) <= min(costs) * args.max_ratio
+
+
+def load_settings_legacy():
+    # What CountdownWindow and SettingsWindow used to read, key by key
+    from PyQt5.QtCore import QDateTime, QSettings, Qt
+    for _ in range(2):
+        settings = QSettings("CountdownApp", "DesktopCountdown")
+        settings.value("display_text", "目标时间还有: ")
+        QDateTime.currentDateTime().addSecs(3600)
+        QDateTime.fromString(settings.value("target_time"), Qt.ISODate)
+        settings.value("bg_opacity", 200, type=int)
+        settings.value("bg_color", "40,40,40", type=str)
+        settings.value("text_color", "255,255,255", type=str)
+        settings.value("font_size", 42, type=int)
+        settings.value("alignment", "center")
+        settings.value("auto_wallpaper", False, type=bool)
+        settings.value("auto_start", False, type=bool)
+        settings.value("auto_continue", True, type=bool)
+        settings.value("adaptive_tick", True, type=bool)
+        settings.value("window_pos", None)
+
+
+def bench_settings(args):
+    # Cold-start settings load, each sample in a fresh interpreter
+    if args.child:
+        from PyQt5.QtCore import QSettings
+        from config import Config
+        QSettings.setPath(QSettings.NativeFormat, QSettings.UserScope, args.settings_dir)
+        start = time.perf_counter()
+        if args.child == "legacy":
+            load_settings_legacy()
+        else:
+            Config()
+        print(time.perf_counter() - start)
+        return True
+
+    # Sample against a fully populated settings file
+    from PyQt5.QtCore import QPoint, QSettings
+    from config import Config
+    settings_dir = tempfile.mkdtemp()
+    QSettings.setPath(QSettings.NativeFormat, QSettings.UserScope, settings_dir)
+    settings = QSettings("CountdownApp", "DesktopCountdown")
+    for key, default in Config.DEFAULTS.items():
+        settings.setValue(key, QPoint(100, 100) if default is None else default)
+    settings.setValue("target_time", "2030-01-01T00:00:00")
+    settings.sync()
+
+    results = {}
+    for mode in ("legacy", "config"):
+        samples = []
+        for _ in range(args.runs):
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "settings",
+                 "--child", mode, "--settings-dir", settings_dir],
+                check=True, capture_output=True, text=True).stdout
+            samples.append(float(out.split()[-1]) * 1e3)
+        results[mode] = round(statistics.median(samples), 3)
+
+    # Malformed JSON settings fall back to their defaults here rather than
+    # raising later in a slot
+    from countdown_list import CountdownListModel
+    app = qt_app()
+    QSettings.setPath(QSettings.NativeFormat, QSettings.UserScope, settings_dir)
+    settings = QSettings("CountdownApp", "DesktopCountdown")
+    good = json.dumps([{"name": "a", "target_time": "2030-01-01T00:00:00"}])
+    checks = {}
+    for value in ("not json", '{"name": "a"}', "[1]", '[{"name": "a"}]',
+                  '[{"name": 1, "target_time": "2030-01-01T00:00:00"}]', good):
+        settings.setValue("targets", value)
+        settings.sync()
+        config = Config()
+        expected = good if value == good else Config.DEFAULTS["targets"]
+        checks[value] = config.targets == expected and \
+            CountdownListModel(config).rowCount() == len(json.loads(expected))
+    app.processEvents()
+    print(json.dumps({"runs": args.runs, "median_ms": results, "targets_checked": checks}))
+    return all(checks.values())
+
+
+TOOL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tool.py")
+
+# Runs tool.py (argv[1]) so that it prints "first-frame" and quits once the
+# window has been painted for the first time; tool.py itself knows nothing of it
+FIRST_FRAME_PROBE = """
+import os, runpy, sys
+from PyQt5.QtWidgets import QApplication
+exec_ = QApplication.exec_
+
+def exec_probe():
+    from countdown_window import CountdownWindow
+    for widget in QApplication.topLevelWidgets():
+        if isinstance(widget, CountdownWindow):
+            widget.first_frame.connect(lambda: (print("first-frame", flush=True), QApplication.quit()))
+    return exec_()
+
+QApplication.exec_ = staticmethod(exec_probe)
+sys.argv = sys.argv[1:]
+sys.path.insert(0, os.path.dirname(sys.argv[0]))
+runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+
+# Everything tool.py imports before it creates the QApplication, for -X importtime
+IMPORTS_PROBE = ("import sys; sys.path.insert(0, sys.argv[1]); "
+                 "import tool, single_instance, PyQt5.QtWidgets, countdown_window; "
+                 "print('imported', flush=True)")
+
+
+def first_frame_command(*args):
+    return [sys.executable, "-c", FIRST_FRAME_PROBE, TOOL_PATH, *args]
+
+
+def time_to_listen(command, env, runs):
+    # Median wall time from starting `command` until its single-instance
+    # server accepts connections (the imports plus the QApplication). Seen
+    # from outside, so it also works for a frozen bundle. Needs env's
+    # XDG_CONFIG_HOME in os.environ, as the server name depends on it.
+    from PyQt5.QtNetwork import QLocalSocket
+    from single_instance import server_name
+    name = server_name()
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.DEVNULL)
+        try:
+            while process.poll() is None and time.perf_counter() - start < 30:
+                probe = QLocalSocket()
+                probe.connectToServer(name)
+                if probe.waitForConnected(10):
+                    times.append((time.perf_counter() - start) * 1e3)
+                    probe.disconnectFromServer()
+                    break
+                time.sleep(0.002)
+        finally:
+            process.terminate()
+            process.wait()
+    return round(statistics.median(times), 1) if len(times) == runs else None
+
+
+def bench_startup(args):
+    # Time to first frame and peak RSS of a fresh process from source
+    # (Linux: uses wait4 for per-process rusage). A PyInstaller bundle
+    # cannot be probed from inside, so for one the time until it listens
+    # for a second launch is measured instead.
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    env["XDG_CONFIG_HOME"] = tempfile.mkdtemp()
+    if args.bundle:
+        os.environ["XDG_CONFIG_HOME"] = env["XDG_CONFIG_HOME"]
+        listening_ms = time_to_listen([os.path.abspath(args.bundle)], env, args.runs)
+        print(json.dumps({"command": os.path.abspath(args.bundle), "runs": args.runs,
+                          "listening_ms": listening_ms}))
+        return listening_ms is not None
+    command = first_frame_command()
+
+    frames = []
+    rss = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        process = subprocess.Popen(command, env=env, stdout=subprocess.PIPE,
+                                   stderr=subprocess.DEVNULL, text=True)
+        for line in process.stdout:
+            if line.strip() == "first-frame":
+                frames.append((time.perf_counter() - start) * 1e3)
+                break
+        process.stdout.close()
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        rss.append(usage.ru_maxrss / 1024)
+    if len(frames) != args.runs:
+        print("no first frame reported", file=sys.stderr)
+        return False
+    print(json.dumps({
+        "command": f"{sys.executable} {TOOL_PATH}",
+        "runs": args.runs,
+        "first_frame_ms": {"median": round(statistics.median(frames), 1),
+                           "max": round(max(frames), 1)},
+        "peak_rss_mb": round(max(rss), 1),
+    }))
+    return True
+
+
+def time_to_line(command, env, line, runs):
+    # Median wall time from starting `command` until it prints `line`, and
+    # the stderr of the last run
+    times = []
+    stderr = ""
+    for _ in range(runs):
+        start = time.perf_counter()
+        process = subprocess.run(command, env=env, capture_output=True, text=True, timeout=60)
+        if line in process.stdout.split():
+            times.append((time.perf_counter() - start) * 1e3)
+        stderr = process.stderr
+    return (round(statistics.median(times), 1) if len(times) == runs else None), stderr
+
+
+def bench_bundle(args):
+    # Size, file count and startup time of a PyInstaller bundle, and whether
+    # it keeps to the slim profile of bundle.py. Works on bundles built for
+    # any platform; the startup time needs one that runs here.
+    import bundle
+    directory = os.path.abspath(args.directory)
+    for path in filter(None, (directory, args.compare)):
+        if not os.path.isdir(path):
+            print(f"no bundle at {path}, build it first with `pyinstaller tool_slim.spec`"
+                  " (or `pyinstaller tool.spec` for dist/tool)", file=sys.stderr)
+            return False
+    files = bundle.bundle_files(directory)
+    kinds = {}
+    for path, size in files:
+        kind = kinds.setdefault(bundle.classify(path), {"files": 0, "mb": 0})
+        kind["files"] += 1
+        kind["mb"] += size / 2**20
+    for kind in kinds.values():
+        kind["mb"] = round(kind["mb"], 2)
+    left_out = [(path, size) for path, size in files if not bundle.keep(path)]
+    report = {
+        "bundle": directory,
+        "files": len(files),
+        "size_mb": round(sum(size for _, size in files) / 2**20, 2),
+        "kinds": kinds,
+        "qt_plugins": [path.replace("\\", "/").split("/plugins/")[-1] for path, _ in files
+                       if bundle.classify(path) == "qt_plugins"],
+        "not_in_slim": {"files": len(left_out),
+                        "size_mb": round(sum(size for _, size in left_out) / 2**20, 2)},
+    }
+
+    os.environ["XDG_CONFIG_HOME"] = tempfile.mkdtemp()
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    executable = bundle.find_executable(directory)
+    native = {"linux": "elf", "darwin": "mach-o", "win32": "pe"}.get(sys.platform)
+    report["executable"] = executable and os.path.relpath(executable, directory)
+    report["format"] = executable and bundle.executable_format(executable)
+    if executable and report["format"] == native:
+        report["listening_ms"] = time_to_listen([executable], env, args.runs)
+    else:
+        report["listening_ms"] = None
+
+    # The same startup from source: time until it listens, import time and
+    # loaded modules, then the Qt plugins it loads up to the first frame
+    listening_ms = time_to_listen([sys.executable, TOOL_PATH], env, args.runs)
+    wall_ms, importtime = time_to_line([sys.executable, "-X", "importtime", "-c", IMPORTS_PROBE,
+                                        os.path.dirname(TOOL_PATH)], env, "imported", args.runs)
+    modules = {line.rsplit("|", 1)[-1].strip().split(".")[0]
+               for line in importtime.splitlines() if line.startswith("import time:") and "|" in line}
+    _, debug = time_to_line(first_frame_command(), dict(env, QT_DEBUG_PLUGINS="1"), "first-frame", 1)
+    loaded = [line.split('"')[1] for line in debug.splitlines() if line.startswith("loaded library")]
+    loaded = [path.split("/plugins/")[-1] for path in loaded if "/plugins/" in path]
+    report["source"] = {"listening_ms": listening_ms, "import_ms": wall_ms, "qt_plugins_loaded": loaded}
+
+    if args.compare:
+        other = bundle.bundle_files(os.path.abspath(args.compare))
+        other_mb = sum(size for _, size in other) / 2**20
+        report["compared_to"] = {"bundle": os.path.abspath(args.compare), "files": len(other),
+                                 "size_mb": round(other_mb, 2),
+                                 "saved_mb": round(other_mb - report["size_mb"], 2)}
+
+    checks = {
+        "loaded plugins shipped by slim": bool(loaded) and all(bundle.keep("Qt5/plugins/" + path) for path in loaded),
+        "excluded modules not imported": bool(modules) and not modules & set(bundle.SLIM_EXCLUDES),
+    }
+    if args.expect_slim:
+        checks["nothing outside slim"] = not left_out
+    if report["format"] == native:
+        checks["startup measured"] = report["listening_ms"] is not None
+    report["checks"] = checks
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    return all(checks.values())
+
+
+def bench_wallpaper(args):
+    # Wallpaper color sampling on generated 4K and 8K images from local files
+    app = qt_app()
+    from PyQt5.QtCore import QRect
+    from PyQt5.QtGui import QColor, QImage, QLinearGradient, QPainter
+    from wallpaper import WallpaperSampler
+
+    directory = tempfile.mkdtemp()
+    screen = QRect(0, 0, 3840, 2160)
+    window = QRect(1600, 900, 480, 200)
+    for name, width, height in (("4k", 3840, 2160), ("8k", 7680, 4320)):
+        image = QImage(width, height, QImage.Format_RGB32)
+        painter = QPainter(image)
+        gradient = QLinearGradient(0, 0, width, height)
+        gradient.setColorAt(0, QColor(20, 40, 90))
+        gradient.setColorAt(1, QColor(240, 200, 120))
+        painter.fillRect(image.rect(), gradient)
+        painter.end()
+        for fmt in ("jpg", "png"):
+            path = os.path.join(directory, f"{name}.{fmt}")
+            image.save(path)
+            timings = {}
+            start = time.perf_counter()
+            sampler = WallpaperSampler(path)
+            colors = sampler.colors_for(window, screen)
+            timings["cold_ms"] = round((time.perf_counter() - start) * 1e3, 2)
+
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                sampler.colors_for(window, screen)
+            timings["cached_us"] = round((time.perf_counter() - start) / args.repeat * 1e6, 2)
+
+            start = time.perf_counter()
+            for i in range(args.repeat):
+                sampler.colors = {}  # every move lands on an uncached region
+                sampler.colors_for(window.translated(i % 97 * 30, 0), screen)
+            timings["moved_us"] = round((time.perf_counter() - start) / args.repeat * 1e6, 2)
+            print(json.dumps({"image": f"{name}.{fmt}", "colors": colors, **timings}))
+    app.processEvents()
+    if sys.platform == "win32":
+        return True
+    checks = watch_wallpaper(app, directory)
+    print(json.dumps({"watcher": checks}))
+    return all(checks.values())
+
+
+def watch_wallpaper(app, directory):
+    # The desktop's wallpaper through a stand-in gsettings that logs its
+    # runs: the lookup must not block, and later refreshes must not run
+    # gsettings again, only follow what `monitor` reports
+    from PyQt5.QtCore import QRect
+    from wallpaper import WallpaperSampler, WallpaperWatcher
+    bin_dir = os.path.join(directory, "bin")
+    os.makedirs(bin_dir)
+    log = os.path.join(directory, "gsettings.log")
+    other = os.path.join(directory, "8k.png")
+    script = os.path.join(bin_dir, "gsettings")
+    with open(script, "w") as f:
+        f.write(f"""#!/bin/sh
+echo "$1" >> '{log}'
+sleep 0.2
+if [ "$1" = get ]; then echo "'file://{directory}/4k.png'"; exit; fi
+sleep 0.3
+echo "picture-uri: 'file://{other}'"
+exec sleep 60
+""")
+    os.chmod(script, 0o755)
+    os.environ["PATH"] = bin_dir + os.pathsep + os.environ["PATH"]
+    screen = QRect(0, 0, 3840, 2160)
+    window = QRect(1600, 900, 480, 200)
+
+    start = time.perf_counter()
+    watcher = WallpaperWatcher()
+    changes = []
+    watcher.changed.connect(lambda: changes.append(watcher.path))
+    sampler = WallpaperSampler(watcher=watcher)
+    first = sampler.colors_for(window, screen)
+    lookup_ms = (time.perf_counter() - start) * 1e3
+    deadline = time.monotonic() + 5
+    while len(changes) < 2 and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.005)
+    for _ in range(100):
+        sampler.colors_for(window, screen)
+    with open(log) as f:
+        runs = f.read().split()
+    watcher.stop()
+    return {
+        "lookup does not wait": first is None and lookup_ms < 100,
+        "initial path": changes[:1] == [os.path.join(directory, "4k.png")],
+        "follows changes": changes[1:] == [other] and sampler.current_path() == other,
+        "no run per refresh": sorted(runs) == ["get", "monitor"],
+    }
+
+
+def bench_instance(args):
+    # Launches tool.py twice; the second launch must hand its --target to
+    # the first and exit quickly, leaving one process behind
+    os.environ["XDG_CONFIG_HOME"] = tempfile.mkdtemp()
+    from PyQt5.QtCore import QSettings
+    from PyQt5.QtNetwork import QLocalSocket
+    from single_instance import server_name
+
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tool.py")
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    first = subprocess.Popen([sys.executable, script], env=env,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        name = server_name()
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            probe = QLocalSocket()
+            probe.connectToServer(name)
+            if probe.waitForConnected(50):
+                probe.disconnectFromServer()
+                break
+            time.sleep(0.05)
+        else:
+            print("first instance never started listening", file=sys.stderr)
+            return False
+
+        timings = []
+        ok = True
+        for i in range(args.runs):
+            target = f"2031-01-{i % 28 + 1:02d}T12:00:00"
+            start = time.perf_counter()
+            second = subprocess.run([sys.executable, script, "--target", target], env=env,
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            timings.append((time.perf_counter() - start) * 1e3)
+            ok = ok and second.returncode == 0 and first.poll() is None
+
+        # The running instance stores the handed-over target
+        time.sleep(0.2)
+        settings = QSettings("CountdownApp", "DesktopCountdown")
+        settings.sync()
+        applied = settings.value("target_time") == target
+        print(json.dumps({
+            "runs": args.runs,
+            "second_launch_ms": {"median": round(statistics.median(timings), 1),
+                                 "max": round(max(timings), 1)},
+            "first_still_running": first.poll() is None,
+            "target_applied": applied,
+        }))
+        return ok and applied
+    finally:
+        first.terminate()
+        first.wait()
+
+
+def peak_rss_mb(command, env):
+    # Runs `command` to completion and returns its peak RSS (Linux wait4)
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return usage.ru_maxrss / 1024, process.returncode
+
+
+def bench_headless(args):
+    # Headless output must match the window's label text exactly; also
+    # compares the peak RSS of a headless run with the GUI's.
+    # Memory first: a forked child inherits the parent's peak RSS until exec
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tool.py")
+    env = dict(os.environ, XDG_CONFIG_HOME=tempfile.mkdtemp())
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    headless_rss, headless_code = peak_rss_mb([sys.executable, script, "--headless", "--once"], env)
+    gui_rss, _ = peak_rss_mb(first_frame_command(), env)
+
+    app = qt_app()
+    from countdown_window import CountdownWindow
+    from headless import run_countdown
+
+    class Lines(list):
+        def write(self, line):
+            self.append(line)
+
+    window = CountdownWindow()
+    window.show()
+    app.processEvents()
+    target_ms = window.config.target_time.toMSecsSinceEpoch()
+    cases = [0, 1, 59, 60, 3599, 3600, 86399, 86400, 86401, 3 * DAY_SECONDS + 5]
+    cases += random.Random(args.seed).sample(range(1, 400 * DAY_SECONDS), 50)
+    mismatches = []
+    for remaining in cases:
+        clock = SimulatedClock(target_ms - remaining * 1000)
+        window.scheduler.use_clock(clock)
+        window.start_countdown()
+        lines = Lines()
+        run_countdown(window.config.display_text, target_ms, lines, once=True, clock=clock)
+        if lines != [window.countdown_label.text()]:
+            mismatches.append({"remaining": remaining, "gui": window.countdown_label.text(),
+                               "headless": lines})
+    window.close()
+
+    print(json.dumps({
+        "cases": len(cases),
+        "mismatches": mismatches[:5],
+        "headless_peak_rss_mb": round(headless_rss, 1),
+        "gui_peak_rss_mb": round(gui_rss, 1),
+        "rss_ratio": round(headless_rss / gui_rss, 2),
+    }, ensure_ascii=False))
+    return not mismatches and headless_code == 0 and headless_rss / gui_rss <= args.max_rss_ratio
+
+
+async def status_clients(port, pollers, waiters, duration):
+    # Keep-alive pollers hammering GET /status plus long-polls waiting for
+    # each change; runs in its own process so the load is not in the GUI's
+    request = b"GET /status HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n"
+    latencies = []
+    wake_delays = []
+    errors = []
+    end = time.perf_counter() + duration
+
+    async def fetch(reader, writer, data):
+        writer.write(data)
+        head = await reader.readuntil(b"\r\n\r\n")
+        length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+        return json.loads(await reader.readexactly(length))
+
+    async def poller():
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            while time.perf_counter() < end:
+                start = time.perf_counter()
+                await fetch(reader, writer, request)
+                latencies.append((time.perf_counter() - start) * 1e3)
+        except (OSError, ValueError, asyncio.IncompleteReadError) as error:
+            errors.append(repr(error))
+        writer.close()
+
+    async def waiter():
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            state = await fetch(reader, writer, request)
+            while time.perf_counter() < end:
+                wait = f"GET /status?wait={state['version']}&timeout=1 HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n"
+                new_state = await fetch(reader, writer, wait.encode("ascii"))
+                # Changes published by the bench carry their publish time
+                if new_state["version"] != state["version"] and "published_ms" in new_state:
+                    wake_delays.append(time.time() * 1e3 - new_state["published_ms"])
+                state = new_state
+        except (OSError, ValueError, asyncio.IncompleteReadError) as error:
+            errors.append(repr(error))
+        writer.close()
+
+    await asyncio.gather(*[poller() for _ in range(pollers)], *[waiter() for _ in range(waiters)])
+
+    def percentiles(values):
+        values = sorted(values) or [0.0]
+        return {"p50": round(values[len(values) // 2], 2),
+                "p99": round(values[int(len(values) * 0.99)], 2)}
+    return {
+        "requests_per_s": round((len(latencies) + len(wake_delays)) / duration),
+        "poll_ms": percentiles(latencies),
+        "long_poll_wakeups": len(wake_delays),
+        "wake_delay_ms": percentiles(wake_delays),
+        "errors": errors[:5],
+    }
+
+
+def bench_status(args):
+    # Load test of the status endpoint served by a real CountdownWindow:
+    # many local clients must not make the GUI thread's timer late
+    if args.child_port:
+        print(json.dumps(asyncio.run(status_clients(args.child_port, args.pollers,
+                                                    args.waiters, args.seconds))))
+        return True
+
+    app = qt_app()
+    from PyQt5.QtCore import QEventLoop, QTimer, Qt
+    from countdown_window import CountdownWindow
+    window = CountdownWindow()
+    window.show()
+    app.processEvents()
+    start = time.perf_counter()
+    window.start_status_server(0)
+    start_call_ms = (time.perf_counter() - start) * 1e3
+    wait_for_status(app, window)
+    ready_ms = (time.perf_counter() - start) * 1e3
+    port = window.status_server.port
+    interval_ms = 1000 // args.rate
+
+    def run_gui(seconds):
+        # A GUI-thread timer publishing at `rate` Hz, many times the real
+        # tick rate; returns its lateness and the publish cost
+        lateness, publish = [], []
+        timer = QTimer()
+        timer.setSingleShot(True)
+        timer.setTimerType(Qt.PreciseTimer)
+        due = [time.perf_counter() + interval_ms / 1e3]
+
+        def fire():
+            start = time.perf_counter()
+            lateness.append((start - due[0]) * 1e3)
+            window.status_server.publish(dict(published_ms=time.time() * 1e3,
+                                              text=window.countdown_label.text()))
+            publish.append((time.perf_counter() - start) * 1e6)
+            due[0] = time.perf_counter() + interval_ms / 1e3
+            timer.start(interval_ms)
+
+        timer.timeout.connect(fire)
+        timer.start(interval_ms)
+        loop = QEventLoop()
+        QTimer.singleShot(int(seconds * 1000), loop.quit)
+        loop.exec_()
+        timer.stop()
+        lateness.sort()
+        return {"late_ms_p50": round(lateness[len(lateness) // 2], 2),
+                "late_ms_p99": round(lateness[int(len(lateness) * 0.99)], 2),
+                "publish_us_median": round(statistics.median(publish), 1)}
+
+    idle = run_gui(args.seconds)
+    clients = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "status", "--child-port", str(port),
+         "--pollers", str(args.pollers), "--waiters", str(args.waiters),
+         "--seconds", str(args.seconds)],
+        stdout=subprocess.PIPE, text=True)
+    loaded = run_gui(args.seconds)
+    load = json.loads(clients.communicate()[0])
+    window.close()
+    print(json.dumps({
+        "pollers": args.pollers,
+        "waiters": args.waiters,
+        "publish_hz": args.rate,
+        "start_call_ms": round(start_call_ms, 2),
+        "ready_ms": round(ready_ms, 1),
+        "gui_idle": idle,
+        "gui_loaded": loaded,
+        "clients": load,
+    }))
+    # The p99 lateness is reported only: across processes it depends on how
+    # the OS schedules them, and one slow run says little about the endpoint
+    return (not load["errors"] and load["long_poll_wakeups"] > 0
+            and start_call_ms < ready_ms / 4
+            and loaded["late_ms_p50"] <= args.max_late_ms)
+
+
+def wait_for_status(app, window):
+    # The status child process is started off the GUI thread
+    deadline = time.monotonic() + 10
+    while window.status_server is None and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+
+
+def clock_scenario(remaining_s, events, duration_s, notify=False):
+    # Drives a TickScheduler the way the window's timer does: sleeps run on
+    # the monotonic clock, so a jump or a sleep (SimulatedClock.jump/sleep at
+    # `at_s` monotonic seconds) is only seen at the next wakeup, or at once
+    # when the OS reports it (`notify`). Returns the longest time the display
+    # was wrong after an event (None: never fixed) and the final state.
+    clock = SimulatedClock(1_900_000_000_000)
+    target_ms = clock.now_ms + remaining_s * 1000
+    scheduler = TickScheduler(target_ms, clock, adaptive=True)
+    start = clock.monotonic()
+    end = start + duration_s * 1000
+    events = sorted(events)
+    stale_since = None
+    worst = 0
+
+    def check():
+        nonlocal stale_since, worst
+        correct = scheduler.last_key == scheduler.display_key(seconds_remaining(target_ms, clock.now_ms))
+        if correct and stale_since is not None:
+            worst = max(worst, clock.monotonic() - stale_since)
+            stale_since = None
+        elif not correct and stale_since is None:
+            stale_since = clock.monotonic()
+
+    def arm():
+        delay = scheduler.delay_ms()
+        return None if delay is None else clock.monotonic() + delay
+
+    scheduler.tick()
+    wake = arm()
+    while clock.monotonic() < end:
+        event_at = start + events[0][0] * 1000 if events else None
+        if event_at is not None and (wake is None or event_at < wake):
+            _, kind, ms = events.pop(0)
+            clock.advance(event_at - clock.monotonic())
+            getattr(clock, kind)(ms)
+            check()
+            if not notify:
+                continue
+        elif wake is not None:
+            clock.advance(wake - clock.monotonic())
+        else:
+            break
+        scheduler.tick()
+        check()
+        wake = arm()
+    return {
+        "recovery_ms": None if stale_since is not None else worst,
+        "running": wake is not None,
+        "jumps": scheduler.clock.jumps,
+    }
+
+
+def window_dst(app, zone_name):
+    # Runs the window through both DST transitions of `zone_name` in 2030
+    # with a target 3 h after each; the target must keep its epoch and
+    # every second must be shown exactly once
+    from PyQt5.QtCore import QDate, QDateTime, QTime, QTimeZone, Qt
+    from countdown_window import CountdownWindow
+    os.environ["TZ"] = zone_name
+    time.tzset()
+    window = CountdownWindow()
+    window.show()
+    app.processEvents()
+    zone = QTimeZone(zone_name.encode("ascii"))
+    after = QDateTime(QDate(2030, 1, 1), QTime(0, 0), Qt.UTC)
+    results = []
+    for _ in range(2):
+        transition = zone.nextTransition(after).atUtc
+        after = transition
+        target_ms = transition.toMSecsSinceEpoch() + 3 * 3600 * 1000
+        local = QDateTime.fromMSecsSinceEpoch(target_ms).toString(Qt.ISODate)
+        window.config.update(target_time=QDateTime.fromString(local, Qt.ISODate))
+        clock = SimulatedClock(transition.toMSecsSinceEpoch() - 2 * 3600 * 1000)
+        window.scheduler.use_clock(clock)
+        window.start_countdown()
+        shown = [window.scheduler.last_seconds]
+        offsets = {window.utc_offset}
+        while window.scheduler.deadline_ms is not None:
+            clock.now_ms = window.scheduler.deadline_ms
+            window.update_countdown()
+            shown.append(window.scheduler.last_seconds)
+            offsets.add(window.utc_offset)
+        steps = {a - b for a, b in zip(shown, shown[1:])}
+        results.append({
+            "zone": zone_name,
+            "transition": transition.toString(Qt.ISODate),
+            "target_kept": window.scheduler.target_ms == target_ms,
+            "offsets_seen": len(offsets),
+            "every_second_once": steps == {1} and shown[-1] == 0,
+        })
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+    return results
+
+
+def window_zone_change(app):
+    # A local target follows a time-zone change: 10:00 stays 10:00
+    from PyQt5.QtCore import QDateTime, Qt
+    from countdown_window import CountdownWindow
+    os.environ["TZ"] = "Europe/Berlin"
+    time.tzset()
+    window = CountdownWindow()
+    window.config.update(target_time=QDateTime.fromString("2030-06-01T10:00:00", Qt.ISODate))
+    berlin_ms = window.config.target_time.toMSecsSinceEpoch()
+    clock = SimulatedClock(berlin_ms - 12 * 3600 * 1000)
+    window.scheduler.use_clock(clock)
+    window.start_countdown()
+    os.environ["TZ"] = "Asia/Tokyo"
+    time.tzset()
+    # As reported by ClockEvents
+    clock.advance(1000)
+    window.recompute_countdown()
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+    expected = berlin_ms - 7 * 3600 * 1000
+    return {"target_moved_ms": window.scheduler.target_ms - berlin_ms,
+            "follows_zone": window.scheduler.target_ms == expected,
+            "text": window.countdown_label.text()}
+
+
+def bench_clock(args):
+    # Wall-clock jumps, sleep/resume and DST with simulated clocks
+    hour = 3600 * 1000
+    day = 24 * hour
+    # name, remaining s, events, duration s, notify, allowed recovery ms, jumps
+    scenarios = [
+        ("forward 2 h, clock view", 6 * 3600, [(100, "jump", 2 * hour)], 600, False, 1000, 1),
+        ("back 2 h, clock view", 6 * 3600, [(100, "jump", -2 * hour)], 600, False, 1000, 1),
+        ("forward 2 d, day view", 10 * DAY_SECONDS, [(100, "jump", 2 * day)], 600, False, MAX_SLEEP_MS, 1),
+        ("back 3 d, day view", 10 * DAY_SECONDS, [(100, "jump", -3 * day)], 600, False, MAX_SLEEP_MS, 1),
+        ("sleep 8 h, clock view", 20 * 3600, [(100, "sleep", 8 * hour)], 600, False, 1000, 1),
+        ("sleep 8 h, day view", 3 * DAY_SECONDS, [(100, "sleep", 8 * hour)], 600, False, MAX_SLEEP_MS, 1),
+        ("sleep 8 h, day view, resume reported", 3 * DAY_SECONDS, [(100, "sleep", 8 * hour)], 600, True, 0, 1),
+        ("past the target and back", 600, [(60, "jump", hour), (300, "jump", -hour)], 1500, False, MAX_SLEEP_MS, 2),
+        ("NTP slewing below tolerance", 3600, [(t, "jump", 20) for t in range(60, 600, 60)], 900, False,
+         JUMP_TOLERANCE_MS, 0),
+    ]
+    results = []
+    ok = True
+    for name, remaining, events, duration, notify, allowed, jumps in scenarios:
+        result = clock_scenario(remaining, events, duration, notify)
+        passed = (result["recovery_ms"] is not None and result["recovery_ms"] <= allowed
+                  and result["jumps"] == jumps and result["running"] == (remaining > duration))
+        ok = ok and passed
+        results.append(dict(result, scenario=name, passed=passed))
+
+    app = qt_app()
+    zone = os.environ.get("TZ")
+    try:
+        for zone_name in ("Europe/Berlin", "America/New_York", "Australia/Lord_Howe"):
+            for result in window_dst(app, zone_name):
+                passed = result["target_kept"] and result["every_second_once"] and result["offsets_seen"] == 2
+                ok = ok and passed
+                results.append(dict(result, passed=passed))
+        result = window_zone_change(app)
+        ok = ok and result["follows_zone"]
+        results.append(dict(result, scenario="time zone change", passed=result["follows_zone"]))
+    finally:
+        if zone is None:
+            os.environ.pop("TZ", None)
+        else:
+            os.environ["TZ"] = zone
+        time.tzset()
+    for result in results:
+        print(json.dumps(result, ensure_ascii=False))
+    return ok
+
+
+def write_calendar(path, events, now_ms, seed=0):
+    # A calendar spread over a year either side of now_ms: mostly single
+    # events in UTC, a zone or local time, some all-day, 1 % recurring
+    rng = random.Random(seed)
+    zones = ("Europe/Berlin", "America/New_York", "Asia/Shanghai")
+    rules = ("FREQ=DAILY", "FREQ=DAILY;INTERVAL=3;COUNT=200", "FREQ=WEEKLY;BYDAY=MO,WE,FR",
+             "FREQ=MONTHLY;UNTIL=20301231T000000Z", "FREQ=YEARLY", "FREQ=WEEKLY;INTERVAL=2")
+    day_ms = DAY_SECONDS * 1000
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//bench//EN\r\n")
+        for i in range(events):
+            start = time.gmtime((now_ms + rng.randint(-365, 365) * day_ms + rng.randint(0, day_ms)) // 1000)
+            stamp = time.strftime("%Y%m%dT%H%M%S", start)
+            kind = i % 10
+            f.write(f"BEGIN:VEVENT\r\nUID:{i}@bench\r\nDTSTAMP:{stamp}Z\r\n")
+            if kind < 4:
+                f.write(f"DTSTART:{stamp}Z\r\n")
+            elif kind < 7:
+                f.write(f"DTSTART;TZID={zones[i % len(zones)]}:{stamp}\r\n")
+            elif kind < 9:
+                f.write(f"DTSTART:{stamp}\r\n")
+            else:
+                f.write(f"DTSTART;VALUE=DATE:{stamp[:8]}\r\n")
+            # Long enough to be folded at 75 octets
+            summary = f"事件 {i} " + "说明" * rng.randint(0, 40)
+            encoded = f"SUMMARY:{summary}".encode("utf-8")
+            chunks = [encoded[j:j + 72].decode("utf-8", "ignore") for j in range(0, len(encoded), 72)]
+            f.write("\r\n ".join(chunks) + "\r\n")
+            if i % 100 == 0:
+                f.write(f"RRULE:{rules[i // 100 % len(rules)]}\r\n")
+            f.write("END:VEVENT\r\n")
+        f.write("END:VCALENDAR\r\n")
+
+
+def bench_recurrence(args):
+    # Upcoming-occurrence index of a large calendar: cold parse, cached
+    # load, and the next target by bisect instead of re-scanning the file
+    from recurrence import CalendarIndex, iter_ics_starts, parse_rule, HORIZON_MS
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "calendar.ics")
+    cache = os.path.join(directory, "cache")
+    now_ms = int(time.time() * 1000)
+    write_calendar(path, args.events, now_ms, args.seed)
+
+    start = time.perf_counter()
+    built = CalendarIndex.load(path, now_ms, cache)
+    cold_ms = (time.perf_counter() - start) * 1e3
+    start = time.perf_counter()
+    cached = CalendarIndex.load(path, now_ms, cache)
+    warm_ms = (time.perf_counter() - start) * 1e3
+    # Re-scanning means streaming the file again for every advance
+    start = time.perf_counter()
+    with open(path, encoding="utf-8") as f:
+        starts = list(iter_ics_starts(f, now_ms, now_ms + HORIZON_MS))
+    rescan_ms = (time.perf_counter() - start) * 1e3
+
+    rng = random.Random(args.seed)
+    queries = [now_ms + rng.randint(0, HORIZON_MS) for _ in range(args.queries)]
+    start = time.perf_counter()
+    answers = [cached.next_after(query) for query in queries]
+    next_us = (time.perf_counter() - start) / len(queries) * 1e6
+    expected = [min((s for s in starts if s > query), default=None) for query in queries[:200]]
+
+    # A changed file is noticed by its mtime and re-indexed
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+    start = time.perf_counter()
+    CalendarIndex.load(path, now_ms, cache)
+    touched_ms = (time.perf_counter() - start) * 1e3
+
+    # Rules against local wall-clock times
+    def local(ms):
+        return time.localtime(ms // 1000)[:5]
+    noon = time.mktime((2026, 10, 16, 12, 0, 0, 0, 0, -1)) * 1000  # a Friday
+    checks = {
+        "daily": local(parse_rule("daily 08:00").next_after(noon)) == (2026, 10, 17, 8, 0),
+        "weekly": local(parse_rule("weekly mon,fri 09:30").next_after(noon)) == (2026, 10, 19, 9, 30),
+        "cron": local(parse_rule("*/15 9-17 * * 1-5").next_after(noon)) == (2026, 10, 16, 12, 15),
+        "leap day": local(parse_rule("0 0 29 2 *").next_after(noon)) == (2028, 2, 29, 0, 0),
+        "sorted": all(a <= b for a, b in zip(built.starts, built.starts[1:])),
+        "cached equals built": cached.starts == built.starts and cached.built_ms == built.built_ms,
+        "matches re-scan": answers[:200] == expected and sorted(starts) == list(built.starts),
+        "re-indexed after change": touched_ms > warm_ms * 5,
+    }
+    app = qt_app()
+    window = window_recurrence(app)
+    checks["window moves on"] = all(window.values())
+    startup = window_calendar_startup(app, path, built)
+    checks["first frame not held by indexing"] = startup["first_frame_ms"] < cold_ms / 2
+    checks["target from calendar"] = startup["target_ok"]
+    checks.update(broken_calendar(app, directory))
+    print(json.dumps({
+        "events": args.events,
+        "file_mb": round(os.path.getsize(path) / 2 ** 20, 1),
+        "occurrences": len(built),
+        "index_kb": round(built.starts.itemsize * len(built) / 1024),
+        "cold_ms": round(cold_ms, 1),
+        "cached_ms": round(warm_ms, 2),
+        "rescan_ms": round(rescan_ms, 1),
+        "next_us": round(next_us, 2),
+        "window_first_frame_ms": startup["first_frame_ms"],
+        "window_target_ms": startup["target_after_ms"],
+        "checks": checks,
+    }, ensure_ascii=False))
+    return all(checks.values())
+
+
+def broken_calendar(app, directory):
+    # An out-of-range event is dropped on its own; a calendar that cannot
+    # be read neither stops the window from moving on once the settings
+    # change nor crashes headless mode at the rollover
+    import headless
+    from countdown_window import CountdownWindow
+    from PyQt5.QtCore import QDateTime
+    from recurrence import CalendarIndex, Recurrence, parse_rule
+    now_ms = int(time.time() * 1000)
+    path = os.path.join(directory, "out_of_range.ics")
+    upcoming = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime(now_ms // 1000 + 3600))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("BEGIN:VCALENDAR\r\n"
+                "BEGIN:VEVENT\r\nDTSTART:00010101T000000\r\nEND:VEVENT\r\n"
+                f"BEGIN:VEVENT\r\nDTSTART:{upcoming}\r\nEND:VEVENT\r\n"
+                "END:VCALENDAR\r\n")
+    index = CalendarIndex.load(path, now_ms, os.path.join(directory, "cache"))
+
+    missing = os.path.join(directory, "missing.ics")
+    window = CountdownWindow()
+    window.show()
+    app.processEvents()
+    window.config.update(calendar_file=missing, target_time=QDateTime.currentDateTime().addSecs(-60))
+    window.advance_target()
+    deadline = time.monotonic() + 5
+    while window.next_target_pending and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+    cleared = not window.next_target_pending
+    window.config.update(calendar_file="", recurrence="daily 08:00")
+    while (window.next_target_pending or not window.running) and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+    moved_on = window.config.target_ms() == parse_rule("daily 08:00").next_after(int(time.time() * 1000))
+    window.config.update(recurrence="")
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+
+    output = headless.Output(os.path.join(directory, "headless.txt"))
+    stderr, sys.stderr = sys.stderr, io.StringIO()
+    try:
+        code = headless.run_countdown("", now_ms + 500, output, recurrence=Recurrence("", missing))
+    except Exception:
+        code = None
+    # With --status-port the endpoint must keep serving the final state
+    try:
+        asyncio.run(asyncio.wait_for(headless.serve_countdown(
+            "", now_ms + 500, output, 0, recurrence=Recurrence("", missing)), 3))
+        serving = False
+    except asyncio.TimeoutError:
+        serving = True
+    except Exception:
+        serving = False
+    finally:
+        sys.stderr = stderr
+    return {
+        "out-of-range event dropped": list(index.starts) == [now_ms // 1000 * 1000 + 3600_000],
+        "failed lookup clears pending": cleared,
+        "moves on after settings change": moved_on,
+        "headless survives unreadable calendar": code == 0 and serving,
+    }
+
+
+def window_calendar_startup(app, path, index):
+    # A window whose target is over and whose calendar has no index yet
+    # paints first and moves on once the index is built off the GUI thread
+    from config import Config
+    from countdown_window import CountdownWindow
+    from PyQt5.QtCore import QDateTime
+    os.environ["XDG_CACHE_HOME"] = tempfile.mkdtemp()
+    Config().update(calendar_file=path, target_time=QDateTime.currentDateTime().addSecs(-60))
+    start = time.perf_counter()
+    window = CountdownWindow()
+    window.show()
+    while not window.first_frame_shown:
+        app.processEvents()
+    first_frame_ms = (time.perf_counter() - start) * 1e3
+    while window.next_target_pending or not window.running:
+        app.processEvents()
+        time.sleep(0.001)
+    target_after_ms = (time.perf_counter() - start) * 1e3
+    target_ok = window.config.target_ms() == index.next_after(int(time.time() * 1000))
+    window.config.update(calendar_file="")
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+    return {"first_frame_ms": round(first_frame_ms, 1), "target_after_ms": round(target_after_ms, 1),
+            "target_ok": target_ok}
+
+
+def window_recurrence(app):
+    # The window moves on to the rule's next occurrence after "时间到！"
+    from countdown_window import CountdownWindow
+    from PyQt5.QtCore import QDateTime
+    from recurrence import parse_rule
+    window = CountdownWindow()
+    window.show()
+    app.processEvents()
+    rule = parse_rule("daily 08:00")
+    clock = SimulatedClock(rule.next_after(int(time.time() * 1000)) - 5000)
+    window.scheduler.use_clock(clock)
+    window.config.update(target_time=QDateTime.fromMSecsSinceEpoch(clock.now_ms + 5000),
+                         recurrence="daily 08:00")
+    window.start_countdown()
+    while window.running:
+        clock.now_ms = window.scheduler.deadline_ms
+        window.update_countdown()
+    finished = window.countdown_label.text().endswith("时间到！")
+    holding = window.next_target_timer.isActive()
+    clock.advance(FINISHED_HOLD_MS)
+    window.next_target_timer.stop()
+    window.advance_target()
+    while window.next_target_pending:
+        app.processEvents()
+        time.sleep(0.001)
+    result = {
+        "finished": finished,
+        "holding": holding,
+        "next_day": window.config.target_ms() == rule.next_after(clock.now_ms),
+        "running": window.running,
+    }
+    window.config.update(recurrence="")
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+    return result
+
+
+def milestone_run(app, seconds, milestones):
+    # A real-time countdown of `seconds` with the given milestones; returns
+    # the timer lateness of every display update and the action results
+    import threading
+    from countdown_window import CountdownWindow
+    from PyQt5.QtCore import QDateTime, QEventLoop, QTimer
+
+    results = []
+
+    class Window(CountdownWindow):
+        def milestone_finished(self, milestone, ok, detail):
+            super().milestone_finished(milestone, ok, detail)
+            results.append({"at": milestone["at"], "action": milestone["action"], "ok": ok,
+                            "detail": detail, "gui_thread": threading.current_thread() is threading.main_thread()})
+
+    window = Window()
+    window.show()
+    window.enable_instrumentation()
+    app.processEvents()
+    window.config.update(milestones=json.dumps(milestones))
+    window.config.update(target_time=QDateTime.currentDateTime().addMSecs(seconds * 1000 + 500))
+    window.start_countdown()
+    loop = QEventLoop()
+    QTimer.singleShot(seconds * 1000 + 2500, loop.quit)
+    loop.exec_()
+    lateness = window.probe.histograms["lateness_us"]
+    runner = window.milestone_runner
+    run = {
+        "updates": lateness.count,
+        "lateness_p50_ms": round(lateness.percentiles((50,))[50] / 1000, 2) if lateness.count else None,
+        "lateness_max_ms": round(lateness.max / 1000, 2),
+        "pending": runner.pending if runner else 0,
+        "results": results,
+    }
+    window.config.update(milestones="[]")
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+    return run
+
+
+def bench_milestones(args):
+    # Slow and failing milestone actions must not hold up display updates
+    import http.server
+    import threading
+    from milestones import MilestoneRunner
+    app = qt_app()
+
+    # Local stand-in for a webhook that takes its time to answer
+    received = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_POST(self):
+            received.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+            time.sleep(args.slow_s)
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *_):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    path = os.path.join(tempfile.mkdtemp(), "milestone.json")
+    milestones = [
+        {"at": 5, "action": "command", "value": f"sleep {args.slow_s}"},
+        {"at": 4, "action": "webhook", "value": f"http://127.0.0.1:{server.server_address[1]}/hook"},
+        {"at": 3, "action": "command", "value": "sleep 30", "timeout": 1},
+        {"at": 2, "action": "file", "value": path},
+        {"at": 0, "action": "command", "value": "exit 3"},
+    ]
+    idle = milestone_run(app, args.seconds, [])
+    # As in tool.exe, which has no console: failures must reach the log
+    os.environ["XDG_STATE_HOME"] = tempfile.mkdtemp()
+    stderr, sys.stderr = sys.stderr, None
+    try:
+        busy = milestone_run(app, args.seconds, milestones)
+    finally:
+        sys.stderr = stderr
+    server.shutdown()
+    from milestones import log_path
+    with open(log_path(), encoding="utf-8") as f:
+        logged = f.read().splitlines()
+
+    # Several workers writing the same file: each write replaces it whole
+    from files import write_atomic
+    shared = os.path.join(os.path.dirname(path), "shared.json")
+    errors = []
+
+    def writer(n):
+        try:
+            for i in range(200):
+                write_atomic(shared, lambda f: json.dump({"writer": n, "i": i, "pad": "x" * 4096}, f))
+        except OSError as error:
+            errors.append(error)
+
+    writers = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for thread in writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    with open(shared, encoding="utf-8") as f:
+        last = json.load(f)
+    leftovers = [name for name in os.listdir(os.path.dirname(shared)) if name.endswith(".tmp")]
+
+    # More queued than allowed: the rest are dropped, not queued forever
+    runner = MilestoneRunner(max_pending=4)
+    accepted = sum(runner.submit({"action": "command", "value": "sleep 0.2", "timeout": 5},
+                                 {"milestone": 0, "seconds_remaining": 0, "target_ms": 0, "text": ""})
+                   for _ in range(10))
+    runner.shutdown()
+
+    outcome = {result["at"]: result for result in busy["results"]}
+    with open(path, encoding="utf-8") as f:
+        written = json.load(f)
+    checks = {
+        "every action reported": sorted(outcome) == [0, 2, 3, 4, 5],
+        "slow command ok": outcome.get(5, {}).get("ok") is True,
+        "slow webhook ok": outcome.get(4, {}).get("ok") is True and received[0]["milestone"] == 4,
+        "timeout enforced": outcome.get(3, {}).get("ok") is False and "超时" in outcome[3]["detail"],
+        "file written": written["milestone"] == 2 and written["seconds_remaining"] == 2,
+        "failure reported": outcome.get(0, {}).get("ok") is False,
+        "failures logged": (len(logged) == 2 and "超时" in logged[0] and "exit 3" in logged[1]),
+        "concurrent writers": not errors and last["i"] == 199 and not leftovers,
+        "results in GUI thread": all(result["gui_thread"] for result in busy["results"]),
+        "pool drained": busy["pending"] == 0,
+        "bounded queue": accepted == 4 and runner.dropped == 6,
+        "updates not delayed": (busy["updates"] >= idle["updates"]
+                                and busy["lateness_max_ms"] <= max(idle["lateness_max_ms"] * 2, args.max_late_ms)),
+    }
+    for result in busy.pop("results"):
+        print(json.dumps(result, ensure_ascii=False))
+    idle.pop("results")
+    print(json.dumps({"idle": idle, "with_actions": busy, "checks": checks}, ensure_ascii=False))
+    return all(checks.values())
+
+
+def precision_run(app, window, precision, seconds):
+    # `seconds` of real-time display at a precision: CPU time per second,
+    # updates per second and how much of the label each update repaints
+    from PyQt5.QtCore import QEventLoop, QTimer
+    label = window.countdown_label
+    repainted = []
+
+    def update(*rect):
+        repainted.append(rect[0].width() if rect else label.width())
+        type(label).update(label, *rect)
+
+    window.config.update(precision=precision)
+    app.processEvents()
+    label.update = update
+    ticks, paints = window.scheduler.ticks, label.paint_count
+    loop = QEventLoop()
+    QTimer.singleShot(int(seconds * 1000), loop.quit)
+    cpu = time.process_time()
+    loop.exec_()
+    cpu = time.process_time() - cpu
+    del label.update
+    return {
+        "precision": precision,
+        "updates_per_s": round((window.scheduler.ticks - ticks) / seconds, 1),
+        "paints_per_s": round((label.paint_count - paints) / seconds, 1),
+        "cpu_ms_per_s": round(cpu * 1000 / seconds, 2),
+        "repainted_share": round(sum(repainted) / max(len(repainted) * label.width(), 1), 3),
+        "text": label.text(),
+    }
+
+
+def precision_after_jump(jump_ms):
+    # Changes shown in the simulated second after the wall clock is set
+    # back, when a read outside tick() notices the jump first
+    from scheduler import SimulatedClock, TickScheduler
+    clock = SimulatedClock(0)
+    scheduler = TickScheduler(7_200_000, clock, precision=1)
+    scheduler.set_frame_rate(60)
+    scheduler.tick()
+    clock.advance(scheduler.delay_ms())
+    clock.jump(jump_ms)
+    scheduler.clock()
+    scheduler.tick()
+    start, changes = clock(), 0
+    while clock() - start < 1000:
+        clock.advance(scheduler.delay_ms())
+        changes += scheduler.tick()[1]
+    return changes
+
+
+def precision_last_second(precision):
+    # Texts of the last two seconds in the precision mode, paired with the
+    # seconds the status endpoint and the milestones go by
+    from scheduler import SimulatedClock, TickScheduler, format_remaining_ms
+    clock = SimulatedClock(0)
+    scheduler = TickScheduler(2_000, clock, precision=precision)
+    shown = []
+    while True:
+        seconds, changed = scheduler.tick()
+        if changed:
+            shown.append((seconds, format_remaining_ms(scheduler.remaining_ms, precision)))
+        delay = scheduler.delay_ms()
+        if delay is None:
+            return shown
+        clock.advance(delay)
+
+
+def bench_precision(args):
+    # CPU per second of display at 1 Hz, 10 Hz (tenths) and the refresh
+    # rate (hundredths), then the 1 Hz fallback while hidden
+    app = qt_app()
+    from countdown_window import CountdownWindow
+    from PyQt5.QtCore import QDateTime
+    window = CountdownWindow()
+    window.config.update(target_time=QDateTime.currentDateTime().addSecs(3600))
+    window.show()
+    app.processEvents()
+    window.start_countdown()
+    refresh_rate = round(window.refresh_rate())
+    runs = {f"{hz} Hz": precision_run(app, window, precision, args.seconds)
+            for hz, precision in ((1, 0), (10, 1), (refresh_rate, 2))}
+
+    # Hidden, with the status endpoint still fed: back to whole seconds
+    window.start_status_server(0)
+    wait_for_status(app, window)
+    window.hide()
+    hidden = precision_run(app, window, 2, args.seconds)
+    window.show()
+    shown = precision_run(app, window, 2, 0.5)
+    window.close()
+    if window.status_server is not None:
+        window.status_server.stop()
+
+    frame = runs[f"{refresh_rate} Hz"]
+    checks = {
+        "1 Hz": abs(runs["1 Hz"]["updates_per_s"] - 1) <= 0.5,
+        "10 Hz": abs(runs["10 Hz"]["updates_per_s"] - 10) <= 1.5,
+        "paced to refresh rate": refresh_rate / 2 <= frame["updates_per_s"] <= refresh_rate + 1,
+        "tenths shown": runs["10 Hz"]["text"][-2] == ".",
+        "hundredths shown": frame["text"][-3] == ".",
+        "fraction repainted only": all(run["repainted_share"] <= args.max_share
+                                       for run in (runs["10 Hz"], frame)),
+        "hidden falls back to 1 Hz": hidden["updates_per_s"] <= 1.5 and "." not in hidden["text"],
+        "shown again": shown["text"][-3] == ".",
+        "clock set back": precision_after_jump(-3_600_000) >= 9,
+        "时间到 with the last second": all(
+            (text == "时间到！") == (seconds <= 0) for precision in (1, 2)
+            for seconds, text in precision_last_second(precision)),
+    }
+    for name, run in runs.items():
+        print(json.dumps({"display": name, **run}, ensure_ascii=False))
+    print(json.dumps({"display": "hidden", **hidden}, ensure_ascii=False))
+    print(json.dumps({"refresh_rate": refresh_rate, "checks": checks}))
+    return all(checks.values())
+
+
+def bench_drag(args):
+    # Replays a drag from a mouse polling at --rate Hz in real time and
+    # counts the moves that reach the window system
+    app = qt_app()
+    from config import Config
+    from countdown_window import CountdownWindow
+    from PyQt5.QtCore import QEvent, QPointF, Qt
+    from PyQt5.QtGui import QMouseEvent
+    from PyQt5.QtWidgets import QApplication
+    window = CountdownWindow()
+    window.show()
+    app.processEvents()
+    moves = []
+
+    def move(*pos):
+        moves.append(time.perf_counter())
+        type(window).move(window, *pos)
+
+    window.move = move
+    start_pos = window.pos()
+    grab = QPointF(window.width() / 2, 40)
+
+    def send(kind, offset, buttons=Qt.LeftButton):
+        global_pos = QPointF(start_pos) + grab + QPointF(offset, offset / 2)
+        button = Qt.NoButton if kind == QEvent.MouseMove else Qt.LeftButton
+        QApplication.sendEvent(window, QMouseEvent(kind, grab, global_pos, button, buttons, Qt.NoModifier))
+
+    send(QEvent.MouseButtonPress, 0)
+    events = int(args.seconds * args.rate)
+    start = time.perf_counter()
+    for i in range(1, events + 1):
+        while time.perf_counter() - start < i / args.rate:
+            app.processEvents()
+        send(QEvent.MouseMove, i * args.distance / events)
+    elapsed = time.perf_counter() - start
+    # Dropping applies the last position right away
+    dragging = moves[:]
+    send(QEvent.MouseButtonRelease, args.distance, Qt.NoButton)
+    app.processEvents()
+    end_pos = window.pos()
+    expected = start_pos + QPointF(args.distance, args.distance / 2).toPoint()
+    gaps = [b - a for a, b in zip(dragging, dragging[1:])]
+    frame_s = 1 / window.refresh_rate()
+
+    # The text changing shape on the next tick must not recenter it
+    window.countdown_label.setText(window.get_display_text("12天"))
+    window.adjust_window_size()
+    kept = window.pos() == end_pos
+
+    stored = Config()
+    positions = json.loads(stored.window_positions)
+    screen = QApplication.primaryScreen()
+    window.close()
+    restored = CountdownWindow()
+    restored_pos = restored.pos()
+    # As when the screen it was last on is gone: the position saved per screen
+    restored.config.update(window_pos=None)
+    per_screen_pos = restored.pos()
+    restored.close()
+    checks = {
+        "at most one move per frame": (len(dragging) <= elapsed / frame_s + 1
+                                       and min(gaps, default=frame_s) >= frame_s * 0.9),
+        "ends where dropped": end_pos == expected,
+        "kept on the next tick": kept,
+        "saved for the screen": (stored.alignment == "free"
+                                 and positions.get(screen.name()) == [expected.x() - screen.geometry().x(),
+                                                                      expected.y() - screen.geometry().y()]),
+        "restored on launch": restored_pos == expected,
+        "restored from the screen's position": per_screen_pos == expected,
+    }
+    print(json.dumps({
+        "rate_hz": args.rate,
+        "events": events,
+        "moves": len(dragging),
+        "moves_per_s": round(len(dragging) / elapsed, 1),
+        "refresh_rate": window.refresh_rate(),
+        "checks": checks,
+    }))
+    return all(checks.values())
+
+
+def simulated_screen(name, geometry, dpr):
+    # Stands in for a QScreen that the offscreen platform of Qt 5 cannot
+    # provide: it has a single fixed screen, a multi-screen configuration
+    # only came with Qt 6
+    from PyQt5.QtCore import QObject, QRect, pyqtSignal
+
+    class Screen(QObject):
+        availableGeometryChanged = pyqtSignal(QRect)
+
+        def __init__(self):
+            super().__init__()
+            self.rect = QRect(*geometry)
+
+        def name(self):
+            return name
+
+        def geometry(self):
+            return QRect(self.rect)
+
+        def availableGeometry(self):
+            return QRect(self.rect)
+
+        def devicePixelRatio(self):
+            return dpr
+
+        def move_to(self, *geometry):
+            self.rect = QRect(*geometry)
+            self.availableGeometryChanged.emit(self.rect)
+
+    return Screen()
+
+
+def bench_mirrors(args):
+    # Mirrors of the countdown on more screens: one timer, text in sync,
+    # pixmaps rendered once per DPR bucket, screens added and removed one
+    # at a time
+    app = qt_app()
+    from countdown_window import CountdownWindow
+    from PyQt5.QtCore import QTimer
+    window = CountdownWindow()
+    window.show()
+    app.processEvents()
+    window.config.update(mirror_screens=True)
+    mirrors = window.mirrors
+    only_main = mirrors is not None and not mirrors.windows
+    screens = [simulated_screen("HDMI-1", (800, 0, 1920, 1080), 1.0),
+               simulated_screen("DP-1", (2720, 0, 3840, 2160), 2.0),
+               simulated_screen("DP-2", (6560, 0, 3840, 2160), 2.0)]
+    for screen in screens:
+        mirrors.screen_added(screen)
+    windows = dict(mirrors.windows)
+    cache = window.countdown_label.cache
+
+    clock = SimulatedClock(window.config.target_time.toMSecsSinceEpoch() - 2 * 3600 * 1000)
+    window.scheduler.use_clock(clock)
+    window.start_countdown()
+    app.processEvents()
+    renders = cache.renders
+    labels = [mirror.label for mirror in windows.values()]
+    paints = [label.paint_count for label in labels]
+    in_sync = True
+    start = time.perf_counter()
+    for _ in range(args.ticks):
+        clock.now_ms = window.scheduler.deadline_ms
+        window.update_countdown()
+        app.processEvents()
+        text = window.countdown_label.text()
+        in_sync = in_sync and all(label.text() == text for label in labels)
+    tick_us = (time.perf_counter() - start) / args.ticks * 1e6
+    tick_renders = cache.renders - renders
+    mirror_paints = min(label.paint_count - count for label, count in zip(labels, paints))
+    buckets = len(cache.entries["glyphs"])
+
+    # A restyle renders once per bucket, not once per window
+    renders = cache.renders
+    window.config.update(font_size=window.config.font_size + 2)
+    app.processEvents()
+    restyle_renders = cache.renders - renders
+
+    # Screens come and go one at a time
+    mirrors.screen_added(simulated_screen("DP-3", (10400, 0, 2560, 1440), 1.5))
+    after_add = dict(mirrors.windows)
+    mirrors.screen_removed(screens[1])
+    after_remove = dict(mirrors.windows)
+    followers = len(window.countdown_label.mirrors)
+    screens[0].move_to(-1920, 0, 1920, 1080)
+    moved = windows[screens[0]].frameGeometry()
+    app.processEvents()
+
+    window.config.update(mirror_screens=False, font_size=window.config.font_size - 2)
+    app.processEvents()
+    checks = {
+        "no mirror on the main screen": only_main,
+        "one window per other screen": len(windows) == len(screens),
+        "one timer": not any(mirror.findChildren(QTimer) for mirror in windows.values()),
+        "text in sync": in_sync,
+        "mirrors painted": mirror_paints >= args.ticks,
+        "one glyph set per DPR bucket": buckets == 2,
+        "no renders while ticking": tick_renders == 0,
+        "restyle once per bucket": restyle_renders <= 2 * buckets + 1,
+        "hot-plug adds one window": (len(after_add) == len(windows) + 1
+                                     and all(after_add[s] is w for s, w in windows.items())),
+        "unplug removes one window": (len(after_remove) == len(windows)
+                                      and screens[1] not in after_remove
+                                      and all(after_remove[s] is after_add[s] for s in after_remove)
+                                      and followers == len(after_remove)),
+        "follows screen geometry": abs(moved.center().x() + 960) <= 1,
+        "turned off": window.mirrors is None and not window.countdown_label.mirrors,
+    }
+    print(json.dumps({
+        "screens": 1 + len(screens),
+        "ticks": args.ticks,
+        "us_per_tick": round(tick_us, 1),
+        "dpr_buckets": buckets,
+        "restyle_renders": restyle_renders,
+        "renders_without_sharing": 3 * (1 + len(screens)),
+        "checks": checks,
+    }))
+    window.close()
+    return all(checks.values())
+
+
+def bench_instrument(args):
+    # Cost of a tick (update_countdown plus its paint) with instrumentation
+    # off and on, alternating rounds; checks the snapshot and the histogram
+    app = qt_app()
+    from countdown_window import CountdownWindow
+    from instrumentation import Histogram
+    window = CountdownWindow()
+    window.show()
+    app.processEvents()
+    path = os.path.join(tempfile.mkdtemp(), "instrument.json")
+    window.enable_instrumentation(path)
+    probe = window.probe
+
+    clock = SimulatedClock(window.config.target_ms() - 2 * 3600 * 1000)
+    window.scheduler.use_clock(clock)
+    window.start_countdown()
+    app.processEvents()
+    timings = {"off": [], "on": []}
+    for _ in range(args.rounds):
+        for mode in ("off", "on"):
+            window.probe = window.countdown_label.probe = probe if mode == "on" else None
+            start = time.perf_counter()
+            for _ in range(args.ticks):
+                clock.now_ms = window.scheduler.deadline_ms
+                window.update_countdown()
+                app.processEvents()
+            timings[mode].append((time.perf_counter() - start) / args.ticks * 1e6)
+    window.export_instrumentation()
+    with open(path, encoding="utf-8") as f:
+        snapshot = json.load(f)
+    window.close()
+
+    # Histogram percentiles against exact ones on a long-tailed sample
+    rng = random.Random(args.seed)
+    values = sorted(int(rng.lognormvariate(4, 1.5)) for _ in range(100000))
+    histogram = Histogram()
+    for value in values:
+        histogram.record(value)
+    errors = [abs(v - values[min(len(values) - 1, int(len(values) * p / 100))]) / max(v, 1)
+              for p, v in histogram.percentiles().items()]
+
+    off = statistics.median(timings["off"])
+    on = statistics.median(timings["on"])
+    metrics = snapshot["metrics"]
+    print(json.dumps({
+        "ticks": args.ticks * args.rounds,
+        "us_per_tick_off": round(off, 1),
+        "us_per_tick_on": round(on, 1),
+        "overhead_us": round(on - off, 1),
+        "recorded": {name: metric["count"] for name, metric in metrics.items()},
+        "paint_us": {k: metrics["paint_us"][k] for k in ("p50", "p99", "max")},
+        "histogram_max_error": round(max(errors), 4),
+    }))
+    return set(metrics) >= {"format_us", "set_text_us", "adjust_us", "paint_us"} and max(errors) < 0.035
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+
+
+def calibrate():
+    # Seconds for a fixed pure-Python workload, so timings taken on
+    # different machines can be compared
+    samples = []
+    for _ in range(15):
+        start = time.perf_counter()
+        total = 0
+        for i in range(200000):
+            total += i % 7
+        samples.append(time.perf_counter() - start)
+    return min(samples)
+
+
+def rss_kb():
+    # Current (not peak) resident set size, Linux only
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+
+
+def suite_ticks(app, window, remaining_s, count):
+    # update_countdown once per simulated second, starting `remaining_s` out
+    clock = SimulatedClock(window.config.target_ms() - remaining_s * 1000)
+    window.scheduler.use_clock(clock)
+    window.start_countdown()
+    app.processEvents()
+    start = time.perf_counter()
+    for _ in range(count):
+        clock.advance(1000)
+        window.update_countdown()
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def bench_suite(args):
+    # The countdown and settings hot paths against a stored baseline.
+    # Timings are scaled by calibrate() so the baseline travels between
+    # machines; memory growth is compared as is.
+    app = qt_app()
+    import settings_window
+    from countdown_window import CountdownWindow
+    # save_settings ends in a modal confirmation that would wait for a click
+    settings_window.QMessageBox.information = staticmethod(lambda *a, **k: None)
+
+    def run_rounds(func):
+        # Best of the rounds: noise only ever makes a round slower
+        return min(func() for _ in range(args.rounds))
+
+    def construct():
+        start = time.perf_counter()
+        window = CountdownWindow()
+        elapsed = time.perf_counter() - start
+        window.deleteLater()
+        app.processEvents()
+        return elapsed * 1e3
+
+    construct()  # Imports, fonts and style caches
+    results = {"window_construct_ms": run_rounds(construct)}
+
+    window = CountdownWindow()
+    window.show()
+    app.processEvents()
+    results["tick_day_us"] = run_rounds(lambda: suite_ticks(app, window, 30 * DAY_SECONDS, args.ticks))
+    results["tick_clock_us"] = run_rounds(lambda: suite_ticks(app, window, 12 * 3600, args.ticks))
+
+    def label_style():
+        sizes = (window.config.font_size, window.config.font_size + 8)
+        start = time.perf_counter()
+        for i in range(args.ticks):
+            window.config.font_size = sizes[i % 2]
+            window.update_label_style()
+        window.config.font_size = sizes[0]
+        return (time.perf_counter() - start) / args.ticks * 1e6
+
+    results["label_style_us"] = run_rounds(label_style)
+
+    def adjust():
+        # Forget the cached layout so every call does the full pass
+        start = time.perf_counter()
+        for _ in range(args.ticks):
+            window.layout_key = None
+            window.adjust_window_size()
+        return (time.perf_counter() - start) / args.ticks * 1e6
+
+    results["adjust_window_size_us"] = run_rounds(adjust)
+
+    def settings_cycle():
+        window.show_settings_window()
+        app.processEvents()
+        window.settings_window.save_settings()
+        app.processEvents()
+
+    def settings_cycles():
+        start = time.perf_counter()
+        for _ in range(args.opens // 10):
+            settings_cycle()
+        return (time.perf_counter() - start) / (args.opens // 10) * 1e3
+
+    results["settings_cycle_ms"] = run_rounds(settings_cycles)
+
+    # Warm up caches and allocator pools before looking at growth
+    for _ in range(20):
+        settings_cycle()
+    before = rss_kb()
+    for _ in range(args.opens):
+        settings_cycle()
+    results["settings_growth_kb_per_open"] = (rss_kb() - before) / args.opens
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+
+    calibration = calibrate()
+    report = {"calibration_s": round(calibration, 5),
+              "results": {name: round(value, 3) for name, value in results.items()}}
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(json.dumps(report))
+        return True
+
+    try:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"no baseline at {args.baseline}, run with --update-baseline", file=sys.stderr)
+        return False
+    scale = baseline["calibration_s"] / calibration
+    regressions = []
+    compared = {}
+    for name, value in results.items():
+        expected = baseline["results"].get(name)
+        if expected is None:
+            continue
+        if name.endswith("_kb_per_open"):
+            # Noise in RSS is a few pages; a leak keeps growing
+            failed = value > expected + args.max_growth_kb
+            ratio = None
+        else:
+            value *= scale
+            ratio = value / expected if expected else 1.0
+            failed = ratio > 1 + args.tolerance
+        compared[name] = {"baseline": expected, "now": round(value, 3),
+                          "ratio": None if ratio is None else round(ratio, 2)}
+        if failed:
+            regressions.append(name)
+    print(json.dumps({"scale": round(scale, 3), "compared": compared, "regressions": regressions}))
+    return not regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="桌面倒计时 benchmarks")
+    sub = parser.add_subparsers(dest="command")
+    sub.required = True
+
+    p = sub.add_parser("scheduler", help="tick scheduler over simulated days")
+    p.add_argument("--days", type=int, default=3)
+    p.add_argument("--late-ms", type=int, default=900)
+    p.add_argument("--early-ms", type=int, default=50)
+    p.add_argument("--adaptive", action="store_true",
+                   help="wake only when the displayed text changes")
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=bench_scheduler)
+
+    p = sub.add_parser("layout", help="layout passes per hour of countdown (offscreen)")
+    p.add_argument("--hours", type=int, default=1)
+    p.add_argument("--adaptive", action="store_true")
+    p.add_argument("--max-passes", type=int, default=2,
+                   help="fail when a view needs more layout passes than this")
+    p.set_defaults(func=bench_layout)
+
+    p = sub.add_parser("paint", help="per-tick paint cost of the countdown label (offscreen)")
+    p.add_argument("--ticks", type=int, default=2000)
+    p.add_argument("--full", action="store_true", help="repaint the whole label every tick")
+    p.set_defaults(func=bench_paint)
+
+    p = sub.add_parser("multi", help="shared queue cost per wakeup for many countdowns")
+    p.add_argument("--targets", type=int, nargs="+", default=[100, 1000, 10000])
+    p.add_argument("--active", type=int, default=10,
+                   help="countdowns in the HH:MM:SS view, ticking every second")
+    p.add_argument("--seconds", type=int, default=3600)
+    p.add_argument("--max-ratio", type=float, default=3.0)
+    p.set_defaults(func=bench_multi)
+
+    p = sub.add_parser("settings", help="cold-start settings load, per-key reads vs Config")
+    p.add_argument("--runs", type=int, default=15)
+    p.add_argument("--child", choices=("legacy", "config"), help=argparse.SUPPRESS)
+    p.add_argument("--settings-dir", help=argparse.SUPPRESS)
+    p.set_defaults(func=bench_settings)
+
+    p = sub.add_parser("startup", help="time to first frame and peak RSS of a fresh process")
+    p.add_argument("--runs", type=int, default=10)
+    p.add_argument("--bundle", help="path to the built executable, e.g. dist/tool/tool; "
+                                    "measures the time until it listens")
+    p.set_defaults(func=bench_startup)
+
+    p = sub.add_parser("bundle", help="size, files and startup time of a PyInstaller bundle vs the slim profile")
+    p.add_argument("directory", nargs="?", default="dist/tool_slim")
+    p.add_argument("--expect-slim", action="store_true", help="fail on files the slim profile leaves out")
+    p.add_argument("--compare", metavar="DIRECTORY", help="another bundle, e.g. dist/tool")
+    p.add_argument("--runs", type=int, default=5)
+    p.add_argument("--output", metavar="PATH", help="also write the report here")
+    p.set_defaults(func=bench_bundle)
+
+    p = sub.add_parser("wallpaper", help="wallpaper color sampling on 4K/8K images")
+    p.add_argument("--repeat", type=int, default=1000)
+    p.set_defaults(func=bench_wallpaper)
+
+    p = sub.add_parser("instance", help="second launch hands over to the running instance")
+    p.add_argument("--runs", type=int, default=10)
+    p.set_defaults(func=bench_instance)
+
+    p = sub.add_parser("headless", help="headless output vs window text, and its memory")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--max-rss-ratio", type=float, default=0.5,
+                   help="headless peak RSS over the GUI's; QtCore alone is a third of the GUI's")
+    p.set_defaults(func=bench_headless)
+
+    p = sub.add_parser("status", help="load test of the local status endpoint")
+    p.add_argument("--pollers", type=int, default=200)
+    p.add_argument("--waiters", type=int, default=200)
+    p.add_argument("--rate", type=int, default=20, help="publishes per second")
+    p.add_argument("--seconds", type=float, default=5.0)
+    p.add_argument("--max-late-ms", type=float, default=16.0, help="median lateness, one 60 Hz frame")
+    p.add_argument("--child-port", type=int, help=argparse.SUPPRESS)
+    p.set_defaults(func=bench_status)
+
+    p = sub.add_parser("clock", help="clock jumps, sleep/resume and DST on simulated clocks")
+    p.set_defaults(func=bench_clock)
+
+    p = sub.add_parser("recurrence", help="recurring targets and the upcoming index of a large calendar")
+    p.add_argument("--events", type=int, default=100000)
+    p.add_argument("--queries", type=int, default=10000)
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=bench_recurrence)
+
+    p = sub.add_parser("milestones", help="slow milestone actions vs display updates (real time)")
+    p.add_argument("--seconds", type=int, default=6)
+    p.add_argument("--slow-s", type=float, default=3.0, help="how long the slow actions take")
+    p.add_argument("--max-late-ms", type=float, default=20.0)
+    p.set_defaults(func=bench_milestones)
+
+    p = sub.add_parser("precision", help="CPU per second of display at 1 Hz, 10 Hz and the refresh rate (real time)")
+    p.add_argument("--seconds", type=float, default=3.0)
+    p.add_argument("--max-share", type=float, default=0.3,
+                   help="largest share of the label a sub-second update may repaint")
+    p.set_defaults(func=bench_precision)
+
+    p = sub.add_parser("drag", help="moves per second for a replayed 1000 Hz mouse drag (real time)")
+    p.add_argument("--rate", type=int, default=1000, help="mouse events per second")
+    p.add_argument("--seconds", type=float, default=1.0)
+    p.add_argument("--distance", type=int, default=200, help="pixels dragged to the right")
+    p.set_defaults(func=bench_drag)
+
+    p = sub.add_parser("mirrors", help="countdown mirrored on simulated screens (offscreen)")
+    p.add_argument("--ticks", type=int, default=300)
+    p.set_defaults(func=bench_mirrors)
+
+    p = sub.add_parser("instrument", help="tick cost with instrumentation off and on")
+    p.add_argument("--ticks", type=int, default=500)
+    p.add_argument("--rounds", type=int, default=5)
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=bench_instrument)
+
+    p = sub.add_parser("suite", help="hot paths against the stored baseline, fails on regressions")
+    p.add_argument("--rounds", type=int, default=5)
+    p.add_argument("--ticks", type=int, default=500)
+    p.add_argument("--opens", type=int, default=200, help="settings opens for the memory growth check")
+    p.add_argument("--tolerance", type=float, default=0.5,
+                   help="fail when a timing is this much slower than the baseline")
+    p.add_argument("--max-growth-kb", type=float, default=0.5,
+                   help="fail when each settings open keeps this much more memory than the baseline")
+    p.add_argument("--baseline", default=BASELINE_PATH)
+    p.add_argument("--update-baseline", action="store_true", help="store these results as the baseline")
+    p.set_defaults(func=bench_suite)
+
+    args = parser.parse_args(argv)
+    return 0 if args.func(args) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
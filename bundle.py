@@ -0,0 +1,111 @@
+import os
+
+# What the slim PyInstaller profile (tool_slim.spec) ships, shared with
+# `bench.py bundle`, which checks built bundles against it.
+
+# Qt plugins tool.py can load, per plugin directory; None keeps the whole
+# directory. Qt reads the metadata of every file in a plugin directory it
+# looks in, so each file left out is also one less read at startup.
+SLIM_PLUGINS = {
+    # Windows, X11/Wayland, macOS, and offscreen for `bench.py startup --bundle`
+    "platforms": ("qwindows", "qxcb", "qwayland-generic", "qwayland-egl", "qcocoa", "qoffscreen"),
+    "wayland-shell-integration": None,
+    "wayland-decoration-client": None,
+    "wayland-graphics-integration-client": None,
+    # Wallpapers (PNG and BMP are built into QtGui) and logo.ico
+    "imageformats": ("qjpeg", "qwebp", "qico"),
+    # Typing Chinese in the settings window on Linux
+    "platforminputcontexts": ("composeplatforminputcontextplugin", "ibusplatforminputcontextplugin"),
+}
+
+# Standard library packages no code path of tool.py imports
+SLIM_EXCLUDES = [
+    "tkinter", "unittest", "pydoc", "pydoc_data", "doctest", "lib2to3", "xmlrpc",
+    "sqlite3", "multiprocessing", "pdb", "curses", "distutils", "setuptools",
+]
+
+PLUGIN_SUFFIXES = (".dll", ".so", ".dylib")
+
+
+def split_path(dest):
+    return dest.replace("\\", "/").split("/")
+
+
+def plugin_name(filename):
+    # "libqxcb.so" / "qwindows.dll" -> "qxcb" / "qwindows"
+    name = filename
+    for suffix in PLUGIN_SUFFIXES:
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    return name[3:] if name.startswith("lib") else name
+
+
+def classify(dest):
+    # Kind of a file in a bundle, by its path below the bundle directory
+    parts = split_path(dest)
+    if "Qt5" in parts and "translations" in parts:
+        return "qt_translations"
+    if "Qt5" in parts and "plugins" in parts:
+        return "qt_plugins"
+    if "Qt5" in parts and ("bin" in parts or "lib" in parts):
+        return "qt_libraries"
+    if parts[-1].endswith((".pyd", ".so")) or ".so." in parts[-1]:
+        return "extensions"
+    if parts[-1].endswith((".pyz", ".zip")):
+        return "python"
+    return "other"
+
+
+def keep(dest):
+    # Whether the slim profile ships the file at `dest` (a TOC destination
+    # or a path below the bundle directory)
+    parts = split_path(dest)
+    if "Qt5" in parts and "translations" in parts:
+        # The UI is in Chinese throughout and installs no QTranslator
+        return False
+    if "Qt5" in parts and "plugins" in parts:
+        index = parts.index("plugins")
+        if index + 2 >= len(parts):
+            return True
+        kind = parts[index + 1]
+        if kind not in SLIM_PLUGINS:
+            return False
+        names = SLIM_PLUGINS[kind]
+        return names is None or plugin_name(parts[-1]) in names
+    return True
+
+
+def slim_toc(toc):
+    # A PyInstaller TOC without the entries keep() rejects
+    return [entry for entry in toc if keep(entry[0])]
+
+
+def bundle_files(directory):
+    # (path below `directory`, size) of every file of a built bundle
+    files = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            files.append((os.path.relpath(path, directory), os.path.getsize(path)))
+    return sorted(files)
+
+
+def find_executable(directory):
+    # The launcher next to _internal, e.g. dist/tool_slim/tool(.exe)
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if os.path.isfile(path) and (name.endswith(".exe") or os.access(path, os.X_OK)):
+            return path
+    return None
+
+
+def executable_format(path):
+    with open(path, "rb") as f:
+        magic = f.read(4)
+    if magic == b"\x7fELF":
+        return "elf"
+    if magic[:2] == b"MZ":
+        return "pe"
+    if magic in (b"\xcf\xfa\xed\xfe", b"\xca\xfe\xba\xbe"):
+        return "mach-o"
+    return "unknown"
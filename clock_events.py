@@ -0,0 +1,62 @@
+import sys
+from PyQt5.QtCore import QObject, QCoreApplication, QAbstractNativeEventFilter, pyqtSignal, pyqtSlot
+
+WM_TIMECHANGE = 0x001E
+WM_POWERBROADCAST = 0x0218
+PBT_APMRESUMESUSPEND = 0x0007
+PBT_APMRESUMEAUTOMATIC = 0x0012
+
+
+class WindowsClockFilter(QAbstractNativeEventFilter):
+    def __init__(self, callback):
+        super().__init__()
+        self.callback = callback
+
+    def nativeEventFilter(self, event_type, message):
+        if event_type == b"windows_generic_MSG":
+            from ctypes import wintypes
+            msg = wintypes.MSG.from_address(int(message))
+            if msg.message == WM_TIMECHANGE or (
+                    msg.message == WM_POWERBROADCAST
+                    and msg.wParam in (PBT_APMRESUMESUSPEND, PBT_APMRESUMEAUTOMATIC)):
+                self.callback()
+        return False, 0
+
+
+class ClockEvents(QObject):
+    # Emits `changed` when the system says the clock may have moved under
+    # us: resume from sleep, or the time or time zone being set. Anything
+    # this misses is still caught by TickScheduler's jump detection.
+    changed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.native_filter = None
+        if sys.platform == "win32":
+            self.native_filter = WindowsClockFilter(self.changed.emit)
+            QCoreApplication.instance().installNativeEventFilter(self.native_filter)
+        else:
+            self.connect_dbus()
+
+    def connect_dbus(self):
+        # systemd-logind for sleep, timedated for time zone changes
+        try:
+            from PyQt5.QtDBus import QDBusConnection
+        except ImportError:
+            return
+        bus = QDBusConnection.systemBus()
+        if not bus.isConnected():
+            return
+        bus.connect("org.freedesktop.login1", "/org/freedesktop/login1",
+                    "org.freedesktop.login1.Manager", "PrepareForSleep", self.prepare_for_sleep)
+        bus.connect("org.freedesktop.timedate1", "/org/freedesktop/timedate1",
+                    "org.freedesktop.DBus.Properties", "PropertiesChanged", self.time_settings_changed)
+
+    @pyqtSlot(bool)
+    def prepare_for_sleep(self, sleeping):
+        if not sleeping:
+            self.changed.emit()
+
+    @pyqtSlot(str, "QVariantMap", "QStringList")
+    def time_settings_changed(self, interface, changed, invalidated):
+        self.changed.emit()
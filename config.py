@@ -0,0 +1,132 @@
+import json
+
+from PyQt5.QtCore import QObject, QSettings, QDateTime, Qt, pyqtSignal
+
+from scheduler import PRECISIONS
+
+ALIGNMENTS = ("center", "bottom_right", "top_right", "free")
+
+
+def is_valid_color(value):
+    # "R,G,B" with every component in 0-255
+    try:
+        parts = str(value).split(',')
+        return len(parts) == 3 and all(0 <= int(x) <= 255 for x in parts)
+    except ValueError:
+        return False
+
+
+class Config(QObject):
+    # Every setting of the app, read from QSettings once and shared by all
+    # windows. update() writes a batch of changes with a single sync and
+    # announces the changed keys through `changed`.
+    changed = pyqtSignal(set)
+
+    DEFAULTS = {
+        "display_text": "目标时间还有: ",
+        "target_time": "",
+        "bg_opacity": 200,
+        "bg_color": "40,40,40",
+        "text_color": "255,255,255",
+        "font_size": 42,
+        "alignment": "center",
+        "auto_wallpaper": False,
+        "auto_start": False,
+        "auto_continue": True,
+        "adaptive_tick": True,
+        "precision": 0,
+        "window_pos": None,
+        "window_positions": "{}",
+        "mirror_screens": False,
+        "targets": "[]",
+        "status_port": 0,
+        "recurrence": "",
+        "calendar_file": "",
+        "milestones": "[]",
+    }
+
+    def __init__(self, settings=None, parent=None):
+        super().__init__(parent)
+        self.settings = settings or QSettings("CountdownApp", "DesktopCountdown")
+        self.load()
+
+    def load(self):
+        # Keys holding a made-up default that the next update() must store
+        self.unsaved = set()
+        for key, default in self.DEFAULTS.items():
+            if default is None:
+                value = self.settings.value(key, None)
+            else:
+                value = self.settings.value(key, default, type=type(default))
+            setattr(self, key, value)
+
+        # Validate once here so the windows can trust the values
+        target_time = QDateTime.fromString(self.target_time, Qt.ISODate)
+        if not target_time.isValid():
+            target_time = QDateTime.currentDateTime().addSecs(3600)
+            self.unsaved.add("target_time")
+        self.target_time = target_time
+        for key in ("bg_color", "text_color"):
+            if not is_valid_color(getattr(self, key)):
+                setattr(self, key, self.DEFAULTS[key])
+        if self.alignment not in ALIGNMENTS:
+            self.alignment = self.DEFAULTS["alignment"]
+        try:
+            positions = json.loads(self.window_positions)
+            if not isinstance(positions, dict) or not all(
+                    isinstance(offset, list) and len(offset) == 2
+                    and all(isinstance(v, int) for v in offset) for offset in positions.values()):
+                raise ValueError
+        except ValueError:
+            self.window_positions = self.DEFAULTS["window_positions"]
+        try:
+            targets = json.loads(self.targets)
+            if not isinstance(targets, list) or not all(
+                    isinstance(item, dict) and isinstance(item.get("name"), str)
+                    and isinstance(item.get("target_time"), str) for item in targets):
+                raise ValueError
+        except ValueError:
+            self.targets = self.DEFAULTS["targets"]
+        if self.precision not in PRECISIONS:
+            self.precision = self.DEFAULTS["precision"]
+        if self.recurrence:
+            from recurrence import parse_rule
+            try:
+                parse_rule(self.recurrence)
+            except ValueError:
+                self.recurrence = self.DEFAULTS["recurrence"]
+        if self.milestones != self.DEFAULTS["milestones"]:
+            from milestones import parse_milestones
+            try:
+                parse_milestones(self.milestones)
+            except ValueError:
+                self.milestones = self.DEFAULTS["milestones"]
+
+    def target_ms(self):
+        # Epoch of the target under the current time-zone rules. A local
+        # QDateTime keeps its DST state after a zone change, so rebuild it.
+        target = self.target_time
+        if target.timeSpec() == Qt.LocalTime:
+            target = QDateTime(target.date(), target.time())
+        return target.toMSecsSinceEpoch()
+
+    def update(self, **values):
+        changed = set()
+        for key, value in values.items():
+            if getattr(self, key) == value and key not in self.unsaved:
+                continue
+            setattr(self, key, value)
+            self.unsaved.discard(key)
+            changed.add(key)
+            if value is None:
+                self.settings.remove(key)
+            elif key == "target_time":
+                self.settings.setValue(key, value.toString(Qt.ISODate))
+            else:
+                self.settings.setValue(key, value)
+
+        if changed:
+            # One write for the whole batch; QSettings replaces the file atomically
+            self.settings.sync()
+            self.changed.emit(changed)
+        return changed
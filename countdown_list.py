@@ -0,0 +1,143 @@
+import json
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
+                            QDateTimeEdit, QLineEdit, QListView)
+from PyQt5.QtCore import QTimer, QDateTime, Qt, QAbstractListModel, QModelIndex
+
+from scheduler import CountdownQueue, format_remaining
+
+class CountdownListModel(QAbstractListModel):
+    # Any number of countdowns driven by one timer. Rows are only formatted
+    # when the view asks for them, i.e. for the rows on screen.
+    def __init__(self, config, parent=None):
+        super().__init__(parent)
+        self.config = config
+        self.queue = CountdownQueue()
+        self.entries = []  # (key, name, target QDateTime)
+        self.rows = {}
+        self.next_key = 0
+        
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self.advance)
+        self.active = True
+        
+        for item in json.loads(self.config.targets):
+            target_time = QDateTime.fromString(item["target_time"], Qt.ISODate)
+            if target_time.isValid():
+                self.add_target(item["name"], target_time, save=False)
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.entries)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        key, name, _ = self.entries[index.row()]
+        return f"{name}: {format_remaining(self.queue.seconds(key))}"
+    
+    def add_target(self, name, target_time, save=True):
+        key = self.next_key
+        self.next_key += 1
+        row = len(self.entries)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.entries.append((key, name, target_time))
+        self.rows[key] = row
+        self.queue.add(key, target_time.toMSecsSinceEpoch())
+        self.endInsertRows()
+        if save:
+            self.save()
+        self.arm()
+    
+    def remove_target(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        key, _, _ = self.entries.pop(row)
+        self.queue.remove(key)
+        self.rows = {entry[0]: i for i, entry in enumerate(self.entries)}
+        self.endRemoveRows()
+        self.save()
+        self.arm()
+    
+    def save(self):
+        self.config.update(targets=json.dumps([
+            {"name": name, "target_time": target_time.toString(Qt.ISODate)}
+            for _, name, target_time in self.entries], ensure_ascii=False))
+    
+    def set_active(self, active):
+        # Nothing is shown while the list is hidden, so stop waking up
+        self.active = active
+        if active:
+            self.advance()
+        else:
+            self.timer.stop()
+    
+    def advance(self):
+        rows = [self.rows[key] for key in self.queue.advance()]
+        if rows:
+            self.dataChanged.emit(self.index(min(rows)), self.index(max(rows)), [Qt.DisplayRole])
+        self.arm()
+    
+    def arm(self):
+        delay = self.queue.delay_ms()
+        if delay is None or not self.active:
+            self.timer.stop()
+        else:
+            self.timer.start(delay)
+
+class CountdownListWindow(QWidget):
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.setWindowTitle("多个倒计时")
+        self.setWindowFlags(Qt.Window)
+        self.setMinimumSize(400, 400)
+        
+        main_layout = QVBoxLayout()
+        main_layout.setContentsMargins(20, 20, 20, 20)
+        main_layout.setSpacing(15)
+        
+        # Uniform rows let the view lay out only what is on screen
+        self.list_view = QListView()
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setModel(self.model)
+        self.list_view.setStyleSheet("font-size: 16px;")
+        main_layout.addWidget(self.list_view)
+        
+        add_layout = QHBoxLayout()
+        self.name_input = QLineEdit()
+        self.name_input.setPlaceholderText("名称")
+        self.datetime_edit = QDateTimeEdit(QDateTime.currentDateTime().addSecs(3600))
+        self.datetime_edit.setDisplayFormat("yyyy-MM-dd HH:mm:ss")
+        self.datetime_edit.setCalendarPopup(True)
+        add_layout.addWidget(self.name_input)
+        add_layout.addWidget(self.datetime_edit)
+        main_layout.addLayout(add_layout)
+        
+        button_layout = QHBoxLayout()
+        self.add_button = QPushButton("添加")
+        self.add_button.clicked.connect(self.add_target)
+        self.remove_button = QPushButton("删除")
+        self.remove_button.clicked.connect(self.remove_target)
+        button_layout.addWidget(self.add_button)
+        button_layout.addWidget(self.remove_button)
+        main_layout.addLayout(button_layout)
+        
+        self.setLayout(main_layout)
+    
+    def add_target(self):
+        name = self.name_input.text().strip() or "倒计时"
+        self.model.add_target(name, self.datetime_edit.dateTime())
+        self.name_input.clear()
+    
+    def remove_target(self):
+        index = self.list_view.currentIndex()
+        if index.isValid():
+            self.model.remove_target(index.row())
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.model.set_active(True)
+    
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.model.set_active(False)
@@ -0,0 +1,919 @@
+import json
+import math
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+# Only what the countdown window needs; the settings and list windows are
+# imported when first opened
+from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout,
+                            QPushButton, QMainWindow)
+from PyQt5.QtGui import QFont, QColor, QFontMetrics, QPainter, QPixmap
+from PyQt5.QtCore import (QTimer, QDateTime, Qt, QPoint, QEvent, QRect, QSize,
+                          pyqtSignal)
+
+from config import Config
+from scheduler import (FINISHED_HOLD_MS, MAX_SLEEP_MS, TickScheduler, format_remaining,
+                       format_remaining_ms, seconds_remaining)
+
+DIGITS = re.compile(r"\d")
+
+
+def align_geometry(window_geometry, screen_geometry, alignment):
+    # Move `window_geometry` into `screen_geometry` as the alignment setting
+    # says; a freely placed window with no position for the screen is centered
+    if alignment in ("center", "free"):
+        window_geometry.moveCenter(screen_geometry.center())
+    elif alignment == "bottom_right":
+        window_geometry.moveBottomRight(screen_geometry.bottomRight() - QPoint(20, 20))
+    elif alignment == "top_right":
+        window_geometry.moveTopRight(screen_geometry.topRight() + QPoint(-20, 20))
+    return window_geometry
+
+
+def dpr_bucket(dpr):
+    # Screens within a quarter of a device pixel ratio share rendered pixmaps
+    return round(dpr * 4) / 4
+
+
+class RenderCache:
+    # Layouts and pixmaps shared by every label showing the same countdown,
+    # e.g. the mirrors on other screens. Pixmaps are keyed by style and DPR
+    # bucket, so screens with the same DPI reuse them; the least recently
+    # used entries go once a kind holds more than MAX_ENTRIES.
+    MAX_ENTRIES = 8
+    
+    def __init__(self):
+        self.entries = {}
+        self.renders = 0
+    
+    def get(self, kind, key, render):
+        entries = self.entries.setdefault(kind, OrderedDict())
+        value = entries.get(key)
+        if value is None:
+            value = entries[key] = render()
+            self.renders += 1
+            if len(entries) > self.MAX_ENTRIES:
+                entries.popitem(last=False)
+        else:
+            entries.move_to_end(key)
+        return value
+
+class CountdownLabel(QWidget):
+    # Drop-in replacement for the countdown QLabel. The rounded background
+    # and the static prefix are cached in one pixmap and the changing part
+    # is drawn from pre-rendered glyphs, so a tick only repaints the cells
+    # whose character changed. Labels mirroring this one get its text and
+    # style pushed to them and draw from the same RenderCache.
+    PADDING = 20
+    RADIUS = 15
+    GLYPHS = "0123456789:.天"
+    
+    def __init__(self, text="", parent=None, cache=None):
+        super().__init__(parent)
+        self.prefix = ""
+        self.label_text = text
+        self.bg_color = QColor(40, 40, 40, 200)
+        self.text_color = QColor(255, 255, 255)
+        self.label_font = QFont()
+        self.label_font.setBold(True)
+        self.label_font.setPixelSize(42)
+        
+        self.cache = cache or RenderCache()
+        self.mirrors = []
+        # DPR of the screen this label is shown on, when known beforehand
+        self.screen_dpr = None
+        self.background = None
+        self.background_key = None
+        self.glyphs = {}
+        self.glyphs_key = None
+        self.cells = None
+        self.cells_key = None
+        self.rects = []
+        self.static_left = 0
+        
+        # Paint statistics, read by bench.py
+        self.paint_count = 0
+        self.paint_time = 0.0
+        # Instrumentation, only set while it is turned on
+        self.probe = None
+    
+    def set_style(self, bg_color, text_color, font_size, opacity):
+        for mirror in self.mirrors:
+            mirror.prefix = self.prefix
+            mirror.set_style(bg_color, text_color, font_size, opacity)
+        r, g, b = map(int, bg_color.split(','))
+        tr, tg, tb = map(int, text_color.split(','))
+        self.bg_color = QColor(r, g, b, opacity)
+        self.text_color = QColor(tr, tg, tb)
+        self.label_font.setPixelSize(font_size)
+        self.cells_key = None
+        self.updateGeometry()
+        self.update()
+    
+    def text(self):
+        return self.label_text
+    
+    def add_mirror(self, label):
+        # Show the same text and style on `label` from now on
+        label.prefix = self.prefix
+        label.bg_color = QColor(self.bg_color)
+        label.text_color = QColor(self.text_color)
+        label.label_font.setPixelSize(self.label_font.pixelSize())
+        label.cells_key = None
+        label.setText(self.label_text)
+        self.mirrors.append(label)
+    
+    def remove_mirror(self, label):
+        if label in self.mirrors:
+            self.mirrors.remove(label)
+    
+    def setText(self, text):
+        if text == self.label_text:
+            return
+        for mirror in self.mirrors:
+            mirror.setText(text)
+        old_key, old_cells = self.cells_key, self.cells
+        self.label_text = text
+        key, cells = self.layout_cells()
+        if key != old_key:
+            self.update()
+            return
+        for (old_char, rect), (char, _) in zip(old_cells, cells):
+            if char != old_char:
+                self.update(rect)
+    
+    def split_text(self):
+        if self.prefix and self.label_text.startswith(self.prefix):
+            return self.prefix, self.label_text[len(self.prefix):]
+        return "", self.label_text
+    
+    def layout_cells(self):
+        # One cell per character of the changing part, placed as QLabel
+        # would center the whole text
+        static, value = self.split_text()
+        key = (static, DIGITS.sub("0", value), self.width(), self.height(),
+               self.label_font.pixelSize())
+        if key != self.cells_key:
+            self.static_left, self.rects = self.cache.get(
+                "layout", key, lambda: self.compute_layout(static, value))
+            self.cells_key = key
+        self.cells = list(zip(value, self.rects))
+        return self.cells_key, self.cells
+    
+    def compute_layout(self, static, value):
+        metrics = QFontMetrics(self.label_font)
+        advances = [metrics.horizontalAdvance(char) for char in value]
+        static_width = metrics.horizontalAdvance(static)
+        static_left = (self.width() - static_width - sum(advances)) // 2
+        x = static_left + static_width
+        y = (self.height() - metrics.height()) // 2
+        rects = []
+        for advance in advances:
+            rects.append(QRect(x, y, advance, metrics.height()))
+            x += advance
+        return static_left, rects
+    
+    def render_dpr(self):
+        return dpr_bucket(self.screen_dpr or self.devicePixelRatioF())
+    
+    def background_pixmap(self, static, left):
+        dpr = self.render_dpr()
+        key = (self.bg_color.rgba(), self.text_color.rgba(), self.label_font.pixelSize(),
+               dpr, self.width(), self.height(), static, left)
+        if key != self.background_key:
+            self.background = self.cache.get(
+                "background", key, lambda: self.render_background(static, left, dpr))
+            self.background_key = key
+        return self.background
+    
+    def render_background(self, static, left, dpr):
+        pixmap = QPixmap(math.ceil(self.width() * dpr), math.ceil(self.height() * dpr))
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(self.bg_color)
+        painter.drawRoundedRect(self.rect(), self.RADIUS, self.RADIUS)
+        if static:
+            metrics = QFontMetrics(self.label_font)
+            y = (self.height() - metrics.height()) // 2 + metrics.ascent()
+            painter.setFont(self.label_font)
+            painter.setPen(self.text_color)
+            painter.drawText(left, y, static)
+        painter.end()
+        return pixmap
+    
+    def glyph(self, char):
+        dpr = self.render_dpr()
+        key = (self.text_color.rgba(), self.label_font.pixelSize(), dpr)
+        if key != self.glyphs_key:
+            self.glyphs = self.cache.get(
+                "glyphs", key, lambda: {c: self.render_glyph(c, dpr) for c in self.GLYPHS})
+            self.glyphs_key = key
+        pixmap = self.glyphs.get(char)
+        if pixmap is None:
+            pixmap = self.glyphs[char] = self.render_glyph(char, dpr)
+        return pixmap
+    
+    def render_glyph(self, char, dpr):
+        metrics = QFontMetrics(self.label_font)
+        width = max(metrics.horizontalAdvance(char), 1)
+        pixmap = QPixmap(math.ceil(width * dpr), math.ceil(metrics.height() * dpr))
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        painter.setFont(self.label_font)
+        painter.setPen(self.text_color)
+        painter.drawText(0, metrics.ascent(), char)
+        painter.end()
+        return pixmap
+    
+    def sizeHint(self):
+        metrics = QFontMetrics(self.label_font)
+        return QSize(metrics.horizontalAdvance(self.label_text) + 2 * self.PADDING,
+                     metrics.height() + 2 * self.PADDING)
+    
+    def minimumSizeHint(self):
+        return self.sizeHint()
+    
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.cells_key = None
+    
+    def paintEvent(self, event):
+        start = time.perf_counter()
+        _, cells = self.layout_cells()
+        static, _ = self.split_text()
+        
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self.background_pixmap(static, self.static_left))
+        region = event.region()
+        for char, rect in cells:
+            if region.intersects(rect):
+                painter.drawPixmap(rect.topLeft(), self.glyph(char))
+        painter.end()
+        
+        elapsed = time.perf_counter() - start
+        self.paint_count += 1
+        self.paint_time += elapsed
+        if self.probe is not None:
+            self.probe.record("paint_us", elapsed * 1e6)
+
+class CountdownWindow(QMainWindow):
+    # Emitted once, right after the window has been painted for the first time
+    first_frame = pyqtSignal()
+    # (recurrence, target ms or None, error) from the worker looking up the next target
+    next_target_found = pyqtSignal(object, object, str)
+    # (StatusProcess, bound port or None) once its child process is up
+    status_started = pyqtSignal(object, object)
+    
+    STYLE_KEYS = {"display_text", "bg_color", "text_color", "font_size", "bg_opacity"}
+    
+    def __init__(self, config=None):
+        super().__init__()
+        self.setWindowTitle("桌面倒计时")
+        self.setWindowFlags(Qt.Window | Qt.FramelessWindowHint | Qt.WindowStaysOnBottomHint)
+        self.setAttribute(Qt.WA_TranslucentBackground)
+        
+        # Load settings, shared with the settings window
+        self.config = config or Config()
+        self.config.changed.connect(self.apply_config)
+        
+        # Position the user dragged the window to, kept across restarts
+        self.window_pos = self.config.window_pos
+        # A drag moves the window at most once per frame, to the latest position
+        self.drag_target = None
+        self.drag_moves = 0
+        self.drag_timer = QTimer(self)
+        self.drag_timer.setSingleShot(True)
+        self.drag_timer.timeout.connect(self.apply_drag)
+        # Copies of the countdown on the other screens, when turned on
+        self.mirrors = None
+        self.first_frame.connect(self.show_mirrors)
+        self.layout_key = None
+        self.layout_passes = 0
+        self.first_frame_shown = False
+        
+        # Colors picked from the wallpaper when auto_wallpaper is on
+        self.wallpaper = None
+        self.wallpaper_colors = None
+        self.wallpaper_timer = QTimer(self)
+        self.wallpaper_timer.setInterval(60 * 1000)
+        self.wallpaper_timer.timeout.connect(self.refresh_wallpaper_colors)
+        self.first_frame.connect(self.refresh_wallpaper_colors)
+        
+        # Per-tick measurements, off unless asked for (--instrument/--overlay)
+        self.probe = None
+        self.probe_path = None
+        self.overlay = None
+        
+        # Local JSON endpoint for scripts and dashboards, off by default
+        self.status_server = None
+        self.status_starting = False
+        self.status_started.connect(self.status_server_ready)
+        if self.config.status_port:
+            self.first_frame.connect(lambda: self.start_status_server(self.config.status_port))
+        
+        # Initialize UI
+        self.init_ui()
+        self.place_window()
+        
+        # Initialize timer, re-armed as a single shot for every display change
+        self.scheduler = TickScheduler(self.config.target_ms(),
+                                       adaptive=self.config.adaptive_tick,
+                                       precision=self.config.precision)
+        self.running = False
+        self.utc_offset = QDateTime.currentDateTime().offsetFromUtc()
+        self.zone_checked_ms = None
+        self.clock_events = None
+        self.first_frame.connect(self.watch_clock_events)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self.update_countdown)
+        
+        # Actions at thresholds such as 10 min left, run off the GUI thread
+        self.milestones = None
+        self.milestone_runner = None
+        self.milestone_timer = QTimer(self)
+        self.milestone_timer.setSingleShot(True)
+        self.milestone_timer.setTimerType(Qt.PreciseTimer)
+        self.milestone_timer.timeout.connect(self.fire_milestones)
+        
+        # Next target after "时间到！", from a rule or a calendar
+        self.recurrence = None
+        self.next_target_pending = False
+        self.next_target_found.connect(self.next_target_ready)
+        self.next_target_timer = QTimer(self)
+        self.next_target_timer.setSingleShot(True)
+        self.next_target_timer.timeout.connect(self.advance_target)
+        
+        # Auto-start if enabled and target time is in future
+        if self.config.auto_continue and self.config.target_time > QDateTime.currentDateTime():
+            self.start_countdown()
+        elif self.config.target_time <= QDateTime.currentDateTime():
+            # Not before the first frame: a calendar may need indexing first
+            self.first_frame.connect(self.advance_target)
+    
+    def init_ui(self):
+        # Main central widget
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        
+        # Main layout
+        main_layout = QVBoxLayout(central_widget)
+        main_layout.setContentsMargins(25, 25, 25, 25)
+        main_layout.setSpacing(15)
+        
+        # Countdown display
+        self.countdown_label = CountdownLabel(self.get_display_text("00:00:00"))
+        self.update_label_style()
+        main_layout.addWidget(self.countdown_label)
+        
+        # Settings button
+        self.settings_button = QPushButton("⚙️ 设置")
+        self.settings_button.setFixedSize(100, 40)
+        self.settings_button.setStyleSheet("""
+            QPushButton {
+                font-size: 18px;
+                border: none;
+                background-color: rgba(60, 60, 60, 150);
+                border-radius: 20px;
+                color: white;
+            }
+            QPushButton:hover {
+                background-color: rgba(80, 80, 80, 150);
+            }
+        """)
+        self.settings_button.clicked.connect(self.show_settings_window)
+        
+        # Put settings button in bottom right
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        button_layout.addWidget(self.settings_button)
+        main_layout.addLayout(button_layout)
+    
+    def get_display_text(self, time_str):
+        return f"{self.config.display_text}{time_str}"
+    
+    def center_on_screen(self):
+        screen_geometry = QApplication.desktop().availableGeometry()
+        window_geometry = align_geometry(self.frameGeometry(), screen_geometry, self.config.alignment)
+        self.move(window_geometry.topLeft())
+    
+    def place_window(self):
+        position = self.window_pos
+        if position is None or QApplication.screenAt(position) is None:
+            # None yet or its screen is gone: the one saved for a current screen
+            position = self.saved_position() if self.config.alignment == "free" else None
+        if position is not None:
+            self.window_pos = position
+            self.move(position)
+        else:
+            self.window_pos = None
+            self.center_on_screen()
+        if self.first_frame_shown:
+            self.refresh_wallpaper_colors()
+    
+    def saved_position(self):
+        # Where the window was last dropped on one of the current screens,
+        # the primary screen first
+        positions = json.loads(self.config.window_positions)
+        for screen in [QApplication.primaryScreen()] + QApplication.screens():
+            offset = positions.get(screen.name())
+            if offset is not None:
+                return screen.geometry().topLeft() + QPoint(*offset)
+        return None
+    
+    def save_position(self):
+        # Relative to the screen it was dropped on, so it survives the
+        # screens being rearranged
+        screen = QApplication.screenAt(self.frameGeometry().center()) or self.screen()
+        positions = json.loads(self.config.window_positions)
+        offset = self.window_pos - screen.geometry().topLeft()
+        positions[screen.name()] = [offset.x(), offset.y()]
+        self.config.update(window_pos=self.window_pos, alignment="free",
+                           window_positions=json.dumps(positions, ensure_ascii=False))
+    
+    def refresh_wallpaper_colors(self):
+        # Cached per wallpaper and region, so this is cheap unless either changed
+        if not self.config.auto_wallpaper:
+            self.wallpaper_timer.stop()
+            colors = None
+        else:
+            if self.wallpaper is None:
+                from wallpaper import WallpaperSampler, WallpaperWatcher
+                watcher = WallpaperWatcher(self)
+                watcher.changed.connect(self.refresh_wallpaper_colors)
+                self.wallpaper = WallpaperSampler(watcher=watcher)
+            if not self.wallpaper_timer.isActive():
+                self.wallpaper_timer.start()
+            geometry = self.frameGeometry()
+            screen = QApplication.screenAt(geometry.center()) or QApplication.primaryScreen()
+            colors = self.wallpaper.colors_for(geometry, screen.geometry())
+        if colors != self.wallpaper_colors:
+            self.wallpaper_colors = colors
+            self.update_label_style()
+    
+    def handle_message(self, message):
+        # Command line of this launch, or of a later one handed over by
+        # the single-instance server
+        if message.get("target_time"):
+            target_time = QDateTime.fromString(message["target_time"], Qt.ISODate)
+            if target_time.isValid():
+                self.config.update(target_time=target_time)
+                if not self.running:
+                    self.start_countdown()
+        if message.get("settings"):
+            self.show_settings_window()
+        if message.get("status_port"):
+            self.start_status_server(message["status_port"])
+        if message.get("milestones") is not None:
+            self.config.update(milestones=message["milestones"])
+        if message.get("instrument") or message.get("overlay"):
+            self.enable_instrumentation(message.get("instrument"), message.get("overlay"))
+        if self.isMinimized():
+            self.showNormal()
+    
+    def show_settings_window(self):
+        if getattr(self, 'settings_window', None) is None:
+            from settings_window import SettingsWindow
+            self.settings_window = SettingsWindow(self)
+        else:
+            self.settings_window.refresh()
+        self.settings_window.show()
+        self.settings_window.raise_()
+    
+    def start_status_server(self, port):
+        # The child process takes a while to start, so it is waited for on
+        # a worker thread; status_server_ready gets the bound port
+        if self.status_server is not None or self.status_starting:
+            return
+        from status_server import StatusProcess
+        server = StatusProcess(port)
+        self.status_starting = True
+        server.start_async(lambda bound: self.status_started.emit(server, bound))
+    
+    def status_server_ready(self, server, port):
+        self.status_starting = False
+        if port is None:
+            print(f"无法监听状态端口 {server.port}", file=sys.stderr)
+            return
+        self.status_server = server
+        self.publish_status()
+        # Keep ticking while hidden so the endpoint stays current
+        self.resume_countdown()
+    
+    def publish_status(self):
+        from status_server import snapshot
+        self.status_server.publish(snapshot(self.scheduler.target_ms, self.scheduler.last_seconds,
+                                            self.countdown_label.text()))
+    
+    def enable_instrumentation(self, path=None, overlay=False):
+        # Snapshots go to `path` every few seconds and/or onto a debug overlay
+        if self.probe is None:
+            from instrumentation import Instrumentation
+            self.probe = Instrumentation()
+            self.countdown_label.probe = self.probe
+            self.probe_timer = QTimer(self)
+            self.probe_timer.timeout.connect(self.export_instrumentation)
+        if path:
+            self.probe_path = path
+        if overlay and self.overlay is None:
+            from PyQt5.QtWidgets import QLabel
+            self.overlay = QLabel(self)
+            self.overlay.setStyleSheet("color: #0f0; background-color: rgba(0, 0, 0, 160);"
+                                       "font: 10px monospace; padding: 2px;")
+            self.overlay.move(4, 4)
+            self.overlay.show()
+        # The overlay wants fresh numbers more often than the file does
+        self.probe_timer.start(1000 if self.overlay is not None else 5000)
+    
+    def export_instrumentation(self):
+        if self.probe_path:
+            try:
+                self.probe.write(self.probe_path)
+            except OSError as error:
+                print(f"无法写入 {self.probe_path}: {error}", file=sys.stderr)
+                self.probe_path = None
+        if self.overlay is not None:
+            self.overlay.setText(self.probe.summary())
+            self.overlay.adjustSize()
+            self.overlay.raise_()
+    
+    def show_list_window(self):
+        if getattr(self, 'list_window', None) is None:
+            from countdown_list import CountdownListModel, CountdownListWindow
+            self.list_window = CountdownListWindow(CountdownListModel(self.config))
+        self.list_window.show()
+        self.list_window.raise_()
+    
+    def start_countdown(self):
+        self.running = True
+        self.next_target_timer.stop()
+        self.scheduler.adaptive = self.config.adaptive_tick
+        self.scheduler.set_frame_rate(self.refresh_rate())
+        self.scheduler.set_target(self.config.target_ms())
+        self.arm_milestones()
+        self.update_countdown()
+    
+    def load_recurrence(self):
+        # Parsed once per settings change; a calendar is indexed on first use
+        if self.recurrence is None and (self.config.recurrence or self.config.calendar_file):
+            from recurrence import Recurrence
+            self.recurrence = Recurrence(self.config.recurrence, self.config.calendar_file)
+        return self.recurrence
+    
+    def advance_target(self):
+        # Count down to the next occurrence of the rule or calendar. Indexing
+        # a large calendar takes seconds, so the lookup runs on a worker thread
+        recurrence = self.load_recurrence()
+        if recurrence is None or self.next_target_pending:
+            return
+        self.next_target_pending = True
+        threading.Thread(target=self.find_next_target, args=(recurrence, self.scheduler.clock()),
+                         name="next-target", daemon=True).start()
+    
+    def find_next_target(self, recurrence, now_ms):
+        # Worker thread; the result is delivered to next_target_ready in the
+        # GUI thread, always, or next_target_pending would never be cleared
+        try:
+            target_ms = recurrence.next_after(now_ms)
+        except Exception as error:
+            self.next_target_found.emit(recurrence, None, str(error) or type(error).__name__)
+        else:
+            self.next_target_found.emit(recurrence, target_ms, "")
+    
+    def next_target_ready(self, recurrence, target_ms, error):
+        self.next_target_pending = False
+        if recurrence is not self.recurrence:
+            # The settings changed during the lookup: look up again if still needed
+            if not self.running and self.config.target_time <= QDateTime.currentDateTime():
+                self.advance_target()
+            return
+        if error:
+            print(f"无法读取日历 {self.config.calendar_file}: {error}", file=sys.stderr)
+            return
+        if target_ms is None:
+            return
+        self.config.update(target_time=QDateTime.fromMSecsSinceEpoch(target_ms))
+        if not self.running:
+            self.start_countdown()
+    
+    def watch_clock_events(self):
+        from clock_events import ClockEvents
+        self.clock_events = ClockEvents(self)
+        self.clock_events.changed.connect(self.recompute_countdown)
+    
+    def recompute_countdown(self):
+        # Resume or a time change: don't wait for the next wakeup
+        if self.running:
+            self.zone_checked_ms = None
+            self.timer.stop()
+            self.update_countdown()
+        if self.milestones is not None:
+            self.fire_milestones()
+    
+    def arm_milestones(self):
+        # The schedule is computed once per target; the timer only wakes
+        # when a milestone is due
+        self.milestone_timer.stop()
+        self.milestones = None
+        if self.config.milestones == Config.DEFAULTS["milestones"]:
+            return
+        from milestones import MilestoneSchedule, parse_milestones
+        self.milestones = MilestoneSchedule(parse_milestones(self.config.milestones),
+                                            self.scheduler.target_ms, self.scheduler.clock())
+        self.fire_milestones()
+    
+    def fire_milestones(self):
+        now = self.scheduler.clock()
+        for milestone in self.milestones.due(now):
+            self.run_milestone(milestone, now)
+        next_ms = self.milestones.next_ms()
+        if next_ms is not None:
+            # Capped like the countdown's timer, so a clock jump is noticed
+            self.milestone_timer.start(min(max(0, next_ms - now), MAX_SLEEP_MS))
+    
+    def run_milestone(self, milestone, now):
+        # Only hands the action to the pool; the result arrives as a signal
+        if self.milestone_runner is None:
+            from milestones import MilestoneRunner
+            self.milestone_runner = MilestoneRunner(self)
+            self.milestone_runner.finished.connect(self.milestone_finished)
+            QApplication.instance().aboutToQuit.connect(self.milestone_runner.shutdown)
+        seconds = seconds_remaining(self.scheduler.target_ms, now)
+        payload = {
+            "milestone": milestone["at"],
+            "target_ms": self.scheduler.target_ms,
+            "seconds_remaining": max(seconds, 0),
+            "text": self.get_display_text(format_remaining(seconds)),
+            "fired_ms": now,
+        }
+        if not self.milestone_runner.submit(milestone, payload):
+            from milestones import log_failure
+            log_failure(f"里程碑动作过多，已跳过: {milestone['value']}")
+    
+    def milestone_finished(self, milestone, ok, detail):
+        if not ok:
+            from milestones import log_failure
+            log_failure(f"里程碑动作失败 ({milestone['action']} {milestone['value']}): {detail}")
+    
+    def suspend_countdown(self):
+        if self.status_server is not None:
+            # The endpoint still needs every change
+            return
+        self.timer.stop()
+        self.scheduler.suspend()
+    
+    def resume_countdown(self):
+        # Also when ticking at 1 Hz for the status endpoint while hidden
+        if self.running and (not self.timer.isActive()
+                             or self.scheduler.precision != self.config.precision):
+            self.update_countdown()
+    
+    def is_display_visible(self):
+        handle = self.windowHandle()
+        if self.mirrors is not None and self.mirrors.windows:
+            return True
+        return (self.isVisible() and not self.isMinimized()
+                and (handle is None or handle.isExposed()))
+    
+    def show_mirrors(self):
+        # One more window per screen, all fed by this window's label and timer
+        if self.config.mirror_screens and self.mirrors is None:
+            from mirrors import ScreenMirrors
+            self.mirrors = ScreenMirrors(self)
+            self.resume_countdown()
+        elif not self.config.mirror_screens and self.mirrors is not None:
+            self.mirrors.close()
+            self.mirrors = None
+    
+    def apply_config(self, keys):
+        # Only refresh what the changed settings affect
+        if "window_pos" in keys:
+            self.window_pos = self.config.window_pos
+        if keys & self.STYLE_KEYS:
+            self.update_label_style()
+        if keys & {"alignment", "window_pos"}:
+            self.place_window()
+            if self.mirrors is not None:
+                self.mirrors.place()
+        elif "auto_wallpaper" in keys:
+            self.refresh_wallpaper_colors()
+        if keys & {"display_text", "target_time", "adaptive_tick", "precision"}:
+            if self.running:
+                self.start_countdown()
+            else:
+                self.countdown_label.setText(self.get_display_text("00:00:00"))
+                self.adjust_window_size()
+        if "milestones" in keys and self.running:
+            self.arm_milestones()
+        if "mirror_screens" in keys and self.first_frame_shown:
+            self.show_mirrors()
+        if keys & {"recurrence", "calendar_file"}:
+            self.recurrence = None
+            if not self.running and self.config.target_time <= QDateTime.currentDateTime():
+                self.advance_target()
+    
+    def preview_style(self, bg_color, text_color, font_size, opacity):
+        # Unsaved style from the settings window
+        self.countdown_label.set_style(bg_color, text_color, font_size, opacity)
+        self.adjust_window_size()
+    
+    def update_label_style(self):
+        start = time.perf_counter()
+        bg_color, text_color = self.wallpaper_colors or (self.config.bg_color, self.config.text_color)
+        self.countdown_label.prefix = self.config.display_text
+        self.countdown_label.set_style(bg_color, text_color,
+                                       self.config.font_size, self.config.bg_opacity)
+        self.adjust_window_size()
+        if self.probe is not None:
+            self.probe.record("style_us", (time.perf_counter() - start) * 1e6)
+
+    def adjust_window_size(self):
+        # The geometry only depends on the shape of the text, so skip the
+        # layout pass while just the digits change
+        label = self.countdown_label
+        layout_key = (label.label_font.pixelSize(), DIGITS.sub("0", label.text()))
+        if layout_key == self.layout_key:
+            return
+        self.layout_key = layout_key
+        self.layout_passes += 1
+        
+        # Calculate required size based on text
+        self.countdown_label.adjustSize()
+        label_size = self.countdown_label.sizeHint()
+        
+        # Calculate window size (width + margins, fixed height)
+        width = min(max(label_size.width() + 50, 300), 800)  # Min 300, max 800
+        height = 200  # Fixed height
+        
+        # Adjust window and label size
+        self.resize(width, height)
+        self.countdown_label.setFixedWidth(width - 50)
+        if self.mirrors is not None:
+            self.mirrors.resize(width, height)
+        
+        # Re-center window unless the user dragged it somewhere
+        if self.window_pos is None:
+            self.center_on_screen()
+
+    def check_time_zone(self):
+        # A target in local time moves with the time zone; across a DST
+        # change its epoch stays the same. Asking for the offset costs more
+        # than the rest of a tick, so it is done once a minute and whenever
+        # the system reports a change.
+        now = self.scheduler.clock.monotonic()
+        if self.zone_checked_ms is not None and now - self.zone_checked_ms < MAX_SLEEP_MS:
+            return
+        self.zone_checked_ms = now
+        utc_offset = QDateTime.fromMSecsSinceEpoch(self.scheduler.clock.wall()).offsetFromUtc()
+        if utc_offset != self.utc_offset:
+            self.utc_offset = utc_offset
+            self.scheduler.set_target(self.config.target_ms())
+            if self.milestones is not None:
+                self.arm_milestones()
+    
+    def refresh_rate(self):
+        screen = self.screen()
+        return (screen.refreshRate() if screen is not None else 0) or 60
+    
+    def remaining_text(self, seconds_remaining):
+        if self.scheduler.precision:
+            return format_remaining_ms(self.scheduler.remaining_ms, self.scheduler.precision)
+        return format_remaining(seconds_remaining)
+    
+    def update_countdown(self):
+        probe = self.probe
+        if probe is not None and self.scheduler.deadline_ms is not None:
+            probe.record("lateness_us", (self.scheduler.clock.wall() - self.scheduler.deadline_ms) * 1000)
+        
+        self.check_time_zone()
+        # Fractions of a second only while someone can see them, 1 Hz otherwise
+        visible = self.is_display_visible()
+        self.scheduler.set_precision(self.config.precision if visible else 0)
+        last_seconds = self.scheduler.last_seconds
+        seconds_remaining, changed = self.scheduler.tick()
+        
+        if changed:
+            if probe is None:
+                self.countdown_label.setText(self.get_display_text(
+                    self.remaining_text(seconds_remaining)))
+                
+                # Update window size
+                self.adjust_window_size()
+            else:
+                self.update_text_measured(probe, seconds_remaining)
+            
+            if self.status_server is not None and seconds_remaining != last_seconds:
+                self.publish_status()
+        
+        # Arm the next wakeup for the moment the displayed second changes
+        delay = self.scheduler.delay_ms()
+        if delay is None:
+            self.running = False
+            self.timer.stop()
+            if self.config.recurrence or self.config.calendar_file:
+                # Leave "时间到！" up for a moment, then move on
+                self.next_target_timer.start(FINISHED_HOLD_MS)
+        elif visible or self.status_server is not None:
+            self.timer.start(delay)
+        else:
+            # Nothing to look at, wake up again once the window is shown
+            self.suspend_countdown()
+    
+    def update_text_measured(self, probe, seconds_remaining):
+        # update_countdown's text update, timed step by step
+        start = time.perf_counter()
+        text = self.get_display_text(self.remaining_text(seconds_remaining))
+        formatted = time.perf_counter()
+        self.countdown_label.setText(text)
+        text_set = time.perf_counter()
+        self.adjust_window_size()
+        adjusted = time.perf_counter()
+        probe.record("format_us", (formatted - start) * 1e6)
+        probe.record("set_text_us", (text_set - formatted) * 1e6)
+        probe.record("adjust_us", (adjusted - text_set) * 1e6)
+    
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.first_frame_shown:
+            self.first_frame_shown = True
+            QTimer.singleShot(0, self.first_frame.emit)
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        handle = self.windowHandle()
+        if handle is not None:
+            # Expose events tell us when the window is covered or uncovered
+            handle.removeEventFilter(self)
+            handle.installEventFilter(self)
+        self.resume_countdown()
+    
+    def closeEvent(self, event):
+        if self.mirrors is not None:
+            self.mirrors.close()
+            self.mirrors = None
+        if self.wallpaper is not None:
+            self.wallpaper.watcher.stop()
+            self.wallpaper = None
+        super().closeEvent(event)
+    
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.suspend_countdown()
+    
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.WindowStateChange:
+            if self.isMinimized():
+                self.suspend_countdown()
+            else:
+                self.resume_countdown()
+    
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Expose and obj is self.windowHandle():
+            if obj.isExposed():
+                self.resume_countdown()
+            else:
+                self.suspend_countdown()
+        return super().eventFilter(obj, event)
+    
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.drag_position = event.globalPos() - self.frameGeometry().topLeft()
+            event.accept()
+    
+    def mouseMoveEvent(self, event):
+        # Mice polling at up to 1000 Hz would otherwise flood the window
+        # manager with moves
+        if event.buttons() == Qt.LeftButton and hasattr(self, 'drag_position'):
+            self.drag_target = event.globalPos() - self.drag_position
+            if not self.drag_timer.isActive():
+                self.apply_drag()
+            event.accept()
+    
+    def apply_drag(self):
+        # The first move of a frame right away, the latest of the rest when it ends
+        if self.drag_target is None:
+            return
+        self.move(self.drag_target)
+        self.window_pos = self.drag_target
+        self.drag_target = None
+        self.drag_moves += 1
+        self.drag_timer.start(max(1, round(1000 / self.refresh_rate())))
+    
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.LeftButton and hasattr(self, 'drag_position'):
+            del self.drag_position
+            self.apply_drag()
+            self.drag_timer.stop()
+            if self.window_pos is not None:
+                self.save_position()
+            if self.mirrors is not None:
+                self.mirrors.follow_main_screen()
+            event.accept()
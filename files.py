@@ -0,0 +1,28 @@
+import os
+
+# mkstemp creates files only the owner can read; replaced files get the
+# permissions a plain open() would have given them. Read once at import,
+# as os.umask can only be read by setting it.
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+
+def write_atomic(path, write, binary=False):
+    # Calls write(f) on a new file next to `path`, then replaces `path`
+    # with it, so readers never see half a file. Each call gets its own
+    # temporary file, so concurrent writers of one path do not collide;
+    # the last to finish wins.
+    import tempfile
+    directory, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory or ".", prefix=f".{name}.", suffix=".tmp")
+    try:
+        with open(fd, "wb" if binary else "w", encoding=None if binary else "utf-8") as f:
+            write(f)
+        os.chmod(tmp_path, 0o666 & ~UMASK)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
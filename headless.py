@@ -0,0 +1,184 @@
+import os
+import stat
+import sys
+import time
+from PyQt5.QtCore import QDateTime, Qt
+
+from config import Config
+from files import write_atomic
+from scheduler import FINISHED_HOLD_MS, TickScheduler, format_remaining, wall_clock_ms
+
+
+def render(prefix, seconds):
+    # The same text CountdownWindow shows
+    return f"{prefix}{format_remaining(seconds)}"
+
+
+class Output:
+    # Where each update goes: stdout ("-"), a named pipe, or a regular
+    # file that is rewritten atomically so readers never see half a line
+    def __init__(self, path="-"):
+        self.path = path
+
+    def write(self, line):
+        data = line + "\n"
+        if self.path == "-":
+            sys.stdout.write(data)
+            sys.stdout.flush()
+        elif self.is_fifo():
+            self.write_fifo(data.encode("utf-8"))
+        else:
+            write_atomic(self.path, lambda f: f.write(data))
+
+    def is_fifo(self):
+        try:
+            return stat.S_ISFIFO(os.stat(self.path).st_mode)
+        except OSError:
+            return False
+
+    def write_fifo(self, data):
+        # Never block on a pipe nobody is reading, just skip the update
+        try:
+            fd = os.open(self.path, os.O_WRONLY | os.O_NONBLOCK)
+        except OSError:
+            return
+        try:
+            os.write(fd, data)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+
+def countdown_steps(prefix, target_ms, output, once=False, clock=wall_clock_ms,
+                    recurrence=None, status=None):
+    # The countdown as a generator, so it runs with or without an event
+    # loop. It yields ("sleep", seconds) and ("call", function, argument);
+    # the result of a call is sent back, its exception thrown in. Returns
+    # the exit code; a closed stdout raises BrokenPipeError.
+    if status is not None:
+        from status_server import snapshot
+    scheduler = TickScheduler(target_ms, clock=clock, adaptive=True)
+    while True:
+        seconds, changed = scheduler.tick()
+        if changed:
+            text = render(prefix, seconds)
+            try:
+                output.write(text)
+            except BrokenPipeError:
+                raise
+            except OSError as error:
+                print(f"无法写入输出 {output.path}: {error}", file=sys.stderr)
+                return 1
+            if status is not None:
+                status.publish(snapshot(target_ms, seconds, text, scheduler.clock()))
+        delay = scheduler.delay_ms()
+        if once:
+            return 0
+        if delay is None and recurrence is not None:
+            # Hold "时间到！", then count down to the next occurrence
+            yield ("sleep", FINISHED_HOLD_MS / 1000)
+            try:
+                next_ms = yield ("call", recurrence.next_after, scheduler.clock())
+            except (OSError, ValueError) as error:
+                # Stays at "时间到！"
+                print(f"无法读取日历 {recurrence.calendar_file}: {error}", file=sys.stderr)
+                next_ms = None
+            if next_ms is not None:
+                target_ms = next_ms
+                scheduler.set_target(target_ms)
+                continue
+        if delay is None:
+            return 0
+        yield ("sleep", delay / 1000)
+
+
+def run_countdown(prefix, target_ms, output, once=False, clock=wall_clock_ms, recurrence=None):
+    # Without a status port nothing needs an event loop, and leaving
+    # asyncio unimported keeps a headless run about 10 MB smaller
+    steps = countdown_steps(prefix, target_ms, output, once, clock, recurrence)
+    send, value = steps.send, None
+    try:
+        while True:
+            step = send(value)
+            send, value = steps.send, None
+            if step[0] == "sleep":
+                time.sleep(step[1])
+                continue
+            try:
+                value = step[1](step[2])
+            except Exception as error:
+                send, value = steps.throw, error
+    except StopIteration as stop:
+        return stop.value
+
+
+async def serve_countdown(prefix, target_ms, output, status_port, once=False,
+                          clock=wall_clock_ms, recurrence=None):
+    # run_countdown() on an asyncio loop that also serves --status-port
+    import asyncio
+    from status_server import StatusServer
+    status = StatusServer(status_port)
+    try:
+        await status.start()
+    except OSError as error:
+        print(f"无法监听状态端口 {status_port}: {error}", file=sys.stderr)
+        return 1
+    loop = asyncio.get_running_loop()
+    steps = countdown_steps(prefix, target_ms, output, once, clock, recurrence, status)
+    send, value = steps.send, None
+    try:
+        while True:
+            step = send(value)
+            send, value = steps.send, None
+            if step[0] == "sleep":
+                await asyncio.sleep(step[1])
+                continue
+            # Indexing a large calendar takes seconds; the port keeps answering meanwhile
+            try:
+                value = await loop.run_in_executor(None, step[1], step[2])
+            except Exception as error:
+                send, value = steps.throw, error
+    except StopIteration as stop:
+        code = stop.value
+    if code == 0 and not once:
+        # Keep answering with the final state until interrupted
+        await status.server.serve_forever()
+    return code
+
+
+def main(target=None, output="-", once=False, status_port=None):
+    # Countdown without any widgets, using the GUI's saved settings
+    config = Config()
+    target_time = config.target_time
+    recurrence = None
+    if config.recurrence or config.calendar_file:
+        from recurrence import Recurrence
+        recurrence = Recurrence(config.recurrence, config.calendar_file)
+    if target:
+        target_time = QDateTime.fromString(target, Qt.ISODate)
+        if not target_time.isValid():
+            print(f"无效的目标时间: {target}", file=sys.stderr)
+            return 2
+    target_ms = target_time.toMSecsSinceEpoch()
+    if recurrence is not None and target_ms <= wall_clock_ms():
+        # Already over: start with the next occurrence
+        try:
+            target_ms = recurrence.next_after(wall_clock_ms()) or target_ms
+        except (OSError, ValueError) as error:
+            print(f"无法读取日历 {config.calendar_file}: {error}", file=sys.stderr)
+            return 1
+    try:
+        if status_port:
+            import asyncio
+            return asyncio.run(serve_countdown(config.display_text, target_ms, Output(output),
+                                               status_port, once, recurrence=recurrence))
+        return run_countdown(config.display_text, target_ms, Output(output), once,
+                             recurrence=recurrence)
+    except KeyboardInterrupt:
+        return 0
+    except BrokenPipeError:
+        # The reader went away (`| head -1`): stop quietly, and keep Python
+        # from complaining when it flushes stdout on exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
@@ -0,0 +1,136 @@
+import json
+import time
+from array import array
+
+from files import write_atomic
+
+# Per-tick costs of the render path, all in microseconds
+METRICS = ("lateness_us", "format_us", "set_text_us", "adjust_us", "style_us", "paint_us")
+RING_SIZE = 256
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+class RingBuffer:
+    # The last `size` samples, overwritten in place
+    def __init__(self, size=RING_SIZE):
+        self.size = size
+        self.values = array("d", bytes(8 * size))
+        self.count = 0
+
+    def append(self, value):
+        self.values[self.count % self.size] = value
+        self.count += 1
+
+    def recent(self, n=None):
+        # Oldest first
+        n = min(self.count, self.size, self.size if n is None else n)
+        end = self.count % self.size
+        return [self.values[(end - n + i) % self.size] for i in range(n)]
+
+
+class Histogram:
+    # HDR-style log-linear histogram of non-negative integers. Values below
+    # 2**SUB_BITS get a counter each; every power of two above that is split
+    # into 2**(SUB_BITS - 1) counters, so any value is known to within ~3 %
+    # with a fixed ~1 200 counters up to 2**MAX_BITS (about 12 days in µs).
+    SUB_BITS = 6
+    MAX_BITS = 40
+
+    def __init__(self):
+        self.half = 1 << (self.SUB_BITS - 1)
+        self.limit = (1 << self.MAX_BITS) - 1
+        self.counts = array("q", bytes(8 * (self.index(self.limit) + 1)))
+        self.count = 0
+        self.total = 0
+        self.min = self.limit
+        self.max = 0
+
+    def index(self, value):
+        shift = value.bit_length() - self.SUB_BITS
+        if shift <= 0:
+            return value
+        return (shift + 1) * self.half + (value >> shift) - self.half
+
+    def value_at(self, index):
+        # Middle of the range of values counted at `index`
+        if index < 2 * self.half:
+            return index
+        shift, sub = divmod(index - 2 * self.half, self.half)
+        shift += 1
+        return ((sub + self.half) << shift) + (1 << shift) // 2
+
+    def record(self, value):
+        # On every tick while instrumentation is on, so index() is inlined
+        value = int(value)
+        if value < 0:
+            value = 0
+        elif value > self.limit:
+            value = self.limit
+        shift = value.bit_length() - self.SUB_BITS
+        if shift <= 0:
+            self.counts[value] += 1
+        else:
+            self.counts[(shift + 1) * self.half + (value >> shift) - self.half] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+        if value < self.min:
+            self.min = value
+
+    def percentiles(self, percentiles=PERCENTILES):
+        results = {}
+        if not self.count:
+            return results
+        wanted = sorted(percentiles)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if not count:
+                continue
+            seen += count
+            while wanted and seen >= self.count * wanted[0] / 100:
+                results[wanted.pop(0)] = min(self.value_at(index), self.max)
+            if not wanted:
+                break
+        return results
+
+
+class Instrumentation:
+    # Opt-in measurements of the render path: a ring buffer of recent samples
+    # and a histogram of all samples per metric. The windows only hold a
+    # reference to one of these when it is turned on.
+    def __init__(self, ring_size=RING_SIZE):
+        self.started = time.monotonic()
+        self.rings = {name: RingBuffer(ring_size) for name in METRICS}
+        self.histograms = {name: Histogram() for name in METRICS}
+
+    def record(self, name, value_us):
+        self.rings[name].append(value_us)
+        self.histograms[name].record(value_us)
+
+    def snapshot(self, recent=16):
+        metrics = {}
+        for name in METRICS:
+            histogram = self.histograms[name]
+            if not histogram.count:
+                continue
+            metrics[name] = {
+                "count": histogram.count,
+                "mean": round(histogram.total / histogram.count, 1),
+                "min": histogram.min,
+                "max": histogram.max,
+                **{f"p{p:g}": v for p, v in histogram.percentiles().items()},
+                "recent": [round(v, 1) for v in self.rings[name].recent(recent)],
+            }
+        return {"uptime_s": round(time.monotonic() - self.started, 1), "metrics": metrics}
+
+    def write(self, path):
+        snapshot = self.snapshot()
+        write_atomic(path, lambda f: json.dump(snapshot, f))
+
+    def summary(self):
+        # A few lines for the debug overlay
+        lines = []
+        for name, metric in self.snapshot(recent=0)["metrics"].items():
+            lines.append(f"{name[:-3]:<9} p50 {metric['p50']:>6} p99 {metric['p99']:>6} max {metric['max']:>7} µs")
+        return "\n".join(lines)
@@ -0,0 +1,195 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+import urllib.request
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+
+from files import write_atomic
+
+ACTIONS = ("command", "webhook", "file")
+# Seconds an action may take before it is given up on
+DEFAULT_TIMEOUT = 10
+# Actions wait on a child process, a socket or a file, so a couple of
+# threads are enough; beyond MAX_PENDING queued actions new ones are dropped
+MAX_WORKERS = 2
+MAX_PENDING = 16
+UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+# The failure log is started over (the old one kept as .1) past this size
+LOG_MAX_BYTES = 256 * 1024
+
+
+def parse_seconds(text):
+    # "600", "10m", "1h" -> seconds
+    text = text.strip().lower()
+    unit = UNITS.get(text[-1:])
+    value = int(text[:-1] if unit else text) * (unit or 1)
+    if value < 0:
+        raise ValueError
+    return value
+
+
+def parse_milestones(text):
+    # The JSON list stored in the settings, validated:
+    # [{"at": 600, "action": "command", "value": "...", "timeout": 10}, ...]
+    items = json.loads(text)
+    if not isinstance(items, list):
+        raise ValueError(f"里程碑应为列表: {text}")
+    milestones = []
+    for item in items:
+        if (not isinstance(item, dict) or not isinstance(item.get("at"), int) or item["at"] < 0
+                or item.get("action") not in ACTIONS or not item.get("value")):
+            raise ValueError(f"无效的里程碑: {item}")
+        timeout = item.get("timeout", DEFAULT_TIMEOUT)
+        if not isinstance(timeout, (int, float)) or timeout <= 0:
+            raise ValueError(f"无效的超时: {item}")
+        milestones.append({"at": item["at"], "action": item["action"],
+                           "value": str(item["value"]), "timeout": timeout})
+    return milestones
+
+
+def parse_milestone_arg(text):
+    # --milestone AT:ACTION:VALUE, e.g. 10m:command:notify-send 还剩十分钟
+    try:
+        at, action, value = text.split(":", 2)
+        milestone = {"at": parse_seconds(at), "action": action, "value": value}
+    except ValueError:
+        raise ValueError(f"里程碑格式应为 AT:ACTION:VALUE: {text}") from None
+    return parse_milestones(json.dumps([milestone]))[0]
+
+
+class MilestoneSchedule:
+    # When each milestone of one target fires, sorted, so a check is a
+    # bisect. A milestone fires when the displayed seconds reach its `at`;
+    # the ones already passed when the target is set never fire.
+    def __init__(self, milestones, target_ms, now_ms):
+        entries = sorted((target_ms - (milestone["at"] + 1) * 1000 + 1, i)
+                         for i, milestone in enumerate(milestones))
+        self.times = [fire_ms for fire_ms, _ in entries]
+        self.milestones = [milestones[i] for _, i in entries]
+        self.next = bisect_right(self.times, now_ms)
+
+    def due(self, now_ms):
+        end = bisect_right(self.times, now_ms, self.next)
+        due = self.milestones[self.next:end]
+        self.next = end
+        return due
+
+    def next_ms(self):
+        return self.times[self.next] if self.next < len(self.times) else None
+
+
+def run_command(command, payload, timeout):
+    # The whole process group goes when the time is up, not just the shell
+    env = dict(os.environ, COUNTDOWN_MILESTONE=str(payload["milestone"]),
+               COUNTDOWN_SECONDS=str(payload["seconds_remaining"]),
+               COUNTDOWN_TARGET_MS=str(payload["target_ms"]), COUNTDOWN_TEXT=payload["text"])
+    posix = sys.platform != "win32"
+    process = subprocess.Popen(command, shell=True, env=env, stdin=subprocess.DEVNULL,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                               start_new_session=posix)
+    try:
+        _, stderr = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        if posix:
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+        process.communicate()
+        raise
+    if process.returncode:
+        message = stderr.decode(errors="replace").strip().splitlines()[-1:] or [""]
+        raise RuntimeError(f"退出码 {process.returncode} {message[0]}".strip())
+    return "ok"
+
+
+def post_webhook(url, payload, timeout):
+    request = urllib.request.Request(url, data=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"}, method="POST")
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return str(response.status)
+
+
+def write_file(path, payload):
+    write_atomic(path, lambda f: json.dump(payload, f, ensure_ascii=False))
+    return "ok"
+
+
+def run_action(milestone, payload):
+    action, value, timeout = milestone["action"], milestone["value"], milestone["timeout"]
+    if action == "command":
+        return run_command(value, payload, timeout)
+    if action == "webhook":
+        return post_webhook(value, payload, timeout)
+    return write_file(value, payload)
+
+
+def log_path():
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_STATE_HOME") or os.path.expanduser("~/.local/state")
+    return os.path.join(base, "DesktopCountdown", "milestones.log")
+
+
+def log_failure(message, path=None):
+    # The windowed build has no console (sys.stderr is None there), so
+    # failures are also appended to a log file
+    if sys.stderr is not None:
+        print(message, file=sys.stderr)
+    path = path or log_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path) and os.path.getsize(path) > LOG_MAX_BYTES:
+            os.replace(path, f"{path}.1")
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(f"{datetime.now().isoformat(' ', 'seconds')} {message}\n")
+    except OSError:
+        pass
+
+
+class MilestoneRunner(QObject):
+    # Runs milestone actions on a small thread pool, so a tick never waits
+    # on one. `finished` (milestone, ok, detail) is emitted from the worker
+    # thread and, the runner living in the GUI thread, delivered there.
+    finished = pyqtSignal(dict, bool, str)
+
+    def __init__(self, parent=None, max_workers=MAX_WORKERS, max_pending=MAX_PENDING):
+        super().__init__(parent)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="milestone")
+        self.max_pending = max_pending
+        self.pending = 0
+        self.dropped = 0
+        self.finished.connect(self.action_done)
+
+    def submit(self, milestone, payload):
+        # False when too many actions are still queued or running
+        if self.pending >= self.max_pending:
+            self.dropped += 1
+            return False
+        self.pending += 1
+        self.executor.submit(self.run, milestone, payload)
+        return True
+
+    def run(self, milestone, payload):
+        # Worker thread
+        try:
+            detail = run_action(milestone, payload)
+        except subprocess.TimeoutExpired:
+            self.finished.emit(milestone, False, f"超时 ({milestone['timeout']} 秒)")
+        except Exception as error:
+            self.finished.emit(milestone, False, str(error) or type(error).__name__)
+        else:
+            self.finished.emit(milestone, True, detail)
+
+    @pyqtSlot(dict, bool, str)
+    def action_done(self, milestone, ok, detail):
+        self.pending -= 1
+
+    def shutdown(self):
+        # Queued actions are dropped; running ones end at their timeout
+        self.executor.shutdown(wait=False, cancel_futures=True)
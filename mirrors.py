@@ -0,0 +1,99 @@
+from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout
+from PyQt5.QtCore import QObject, Qt
+
+from countdown_window import CountdownLabel, align_geometry
+
+
+class MirrorWindow(QWidget):
+    # The countdown on one more screen. It has no timer or scheduler of its
+    # own: the main window's label pushes text and style to this label, and
+    # both draw from the same render cache.
+    def __init__(self, screen, source):
+        super().__init__(None, Qt.Tool | Qt.FramelessWindowHint | Qt.WindowStaysOnBottomHint)
+        self.setWindowTitle("桌面倒计时")
+        self.setAttribute(Qt.WA_TranslucentBackground)
+        self.setAttribute(Qt.WA_ShowWithoutActivating)
+        self.target_screen = screen
+        self.alignment = "center"
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(25, 25, 25, 25)
+        self.label = CountdownLabel(cache=source.cache)
+        self.label.screen_dpr = screen.devicePixelRatio()
+        layout.addWidget(self.label)
+        layout.addStretch()
+        source.add_mirror(self.label)
+        screen.availableGeometryChanged.connect(self.place)
+
+    def place(self, *args):
+        geometry = align_geometry(self.frameGeometry(), self.target_screen.availableGeometry(), self.alignment)
+        self.move(geometry.topLeft())
+
+
+class ScreenMirrors(QObject):
+    # A MirrorWindow on every screen but the main window's. Screens plugged
+    # in or out, and the main window moving to another screen, only add or
+    # remove the windows concerned.
+    def __init__(self, window):
+        super().__init__(window)
+        self.window = window
+        self.windows = {}
+        app = QApplication.instance()
+        app.screenAdded.connect(self.screen_added)
+        app.screenRemoved.connect(self.screen_removed)
+        handle = window.windowHandle()
+        if handle is not None:
+            handle.screenChanged.connect(self.follow_main_screen)
+        for screen in app.screens():
+            self.screen_added(screen)
+
+    def main_screen(self):
+        handle = self.window.windowHandle()
+        return handle.screen() if handle is not None else QApplication.primaryScreen()
+
+    def screen_added(self, screen):
+        if screen in self.windows or screen is self.main_screen():
+            return
+        mirror = MirrorWindow(screen, self.window.countdown_label)
+        self.windows[screen] = mirror
+        self.resize_mirror(mirror, self.window.width(), self.window.height())
+        mirror.show()
+
+    def screen_removed(self, screen):
+        mirror = self.windows.pop(screen, None)
+        if mirror is None:
+            return
+        self.window.countdown_label.remove_mirror(mirror.label)
+        mirror.close()
+        mirror.deleteLater()
+
+    def follow_main_screen(self, *args):
+        # The screen the main window left gets a mirror, the one it moved to loses its own
+        main = self.main_screen()
+        self.screen_removed(main)
+        for screen in QApplication.screens():
+            if screen is not main:
+                self.screen_added(screen)
+
+    def resize_mirror(self, mirror, width, height):
+        # The same label size as the main window's, so the layouts and
+        # pixmaps in the shared cache fit both
+        mirror.resize(width, height)
+        mirror.label.setFixedSize(self.window.countdown_label.size())
+        mirror.alignment = self.window.config.alignment
+        mirror.place()
+
+    def resize(self, width, height):
+        for mirror in self.windows.values():
+            self.resize_mirror(mirror, width, height)
+
+    def place(self):
+        self.resize(self.window.width(), self.window.height())
+
+    def close(self):
+        app = QApplication.instance()
+        app.screenAdded.disconnect(self.screen_added)
+        app.screenRemoved.disconnect(self.screen_removed)
+        for screen in list(self.windows):
+            self.screen_removed(screen)
+        self.deleteLater()
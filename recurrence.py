@@ -0,0 +1,398 @@
+import hashlib
+import json
+import os
+import sys
+from array import array
+from bisect import bisect_right
+from datetime import date, datetime, time, timedelta, timezone
+
+from files import write_atomic
+
+# Recurring calendar events are expanded this far ahead; the cached index
+# is rebuilt once half of it has passed
+HORIZON_DAYS = 366
+HORIZON_MS = HORIZON_DAYS * 86400 * 1000
+CACHE_VERSION = 1
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+MONTHS = ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+CRON_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *",
+}
+ICS_WEEKDAYS = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+EVENT_PROPERTIES = ("DTSTART", "RRULE", "EXDATE", "STATUS")
+
+
+def parse_clock_time(text):
+    # "HH:MM" -> (hour, minute)
+    try:
+        hour, minute = (int(part) for part in text.split(":"))
+    except ValueError:
+        raise ValueError(f"时间格式应为 HH:MM: {text}") from None
+    if not (0 <= hour <= 23 and 0 <= minute <= 59):
+        raise ValueError(f"时间超出范围: {text}")
+    return hour, minute
+
+
+def parse_cron_field(text, low, high, names=()):
+    # One cron field ("*", "1,5", "9-17", "*/15", "mon-fri") -> sorted values
+    values = set()
+    for part in text.lower().split(","):
+        part, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if part == "*":
+            start, end = low, high
+        else:
+            bounds = [names.index(name) + low if name in names else int(name)
+                      for name in part.split("-")]
+            start, end = bounds[0], bounds[-1]
+            if step > 1 and len(bounds) == 1:
+                end = high
+        if not (low <= start <= end <= high) or step < 1:
+            raise ValueError
+        values.update(range(start, end + 1, step))
+    return sorted(values)
+
+
+class CronRule:
+    # Minutes in local time matching a cron expression. Like cron, a rule
+    # restricting both day of month and day of week matches either.
+    def __init__(self, expression):
+        expression = CRON_ALIASES.get(expression.strip(), expression)
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"重复规则应为 5 个字段: {expression}")
+        try:
+            self.minutes = parse_cron_field(fields[0], 0, 59)
+            self.hours = parse_cron_field(fields[1], 0, 23)
+            self.days = set(parse_cron_field(fields[2], 1, 31))
+            self.months = set(parse_cron_field(fields[3], 1, 12, MONTHS))
+            # Cron counts Sunday as 0 and 7
+            weekdays = parse_cron_field(fields[4], 0, 7, ("sun",) + WEEKDAYS[:6])
+        except ValueError:
+            raise ValueError(f"无效的重复规则: {expression}") from None
+        # As date.weekday(): Monday is 0
+        self.weekdays = {(day - 1) % 7 for day in weekdays}
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+        self.expression = expression
+
+    def matches_day(self, day):
+        if day.month not in self.months:
+            return False
+        in_month = day.day in self.days
+        in_week = day.weekday() in self.weekdays
+        if self.any_day or self.any_weekday:
+            return in_month and in_week
+        return in_month or in_week
+
+    def next_after(self, now_ms):
+        # Epoch ms of the first matching minute after now_ms, or None
+        start = datetime.fromtimestamp(now_ms / 1000).replace(second=0, microsecond=0)
+        start += timedelta(minutes=1)
+        day = start.date()
+        # 29 February on a given weekday can be years away
+        for _ in range(366 * 8):
+            if self.matches_day(day):
+                first = (start.hour, start.minute) if day == start.date() else (0, 0)
+                for hour in self.hours:
+                    if hour < first[0]:
+                        continue
+                    for minute in self.minutes:
+                        if (hour, minute) < first:
+                            continue
+                        target_ms = int(datetime.combine(day, time(hour, minute)).timestamp() * 1000)
+                        # A time skipped by a DST change resolves to after it
+                        if target_ms > now_ms:
+                            return target_ms
+            day += timedelta(days=1)
+        return None
+
+
+def parse_rule(text):
+    # "daily 08:00", "weekly mon,fri 08:00" or a cron expression; "" is none
+    text = text.strip()
+    if not text:
+        return None
+    words = text.split()
+    kind = words[0].lower()
+    if kind == "daily" and len(words) == 2:
+        hour, minute = parse_clock_time(words[1])
+        return CronRule(f"{minute} {hour} * * *")
+    if kind == "weekly" and len(words) == 3:
+        hour, minute = parse_clock_time(words[2])
+        days = words[1].lower().split(",")
+        if not all(day in WEEKDAYS for day in days):
+            raise ValueError(f"星期应为 {','.join(WEEKDAYS)}: {words[1]}")
+        # Cron numbers the days from Sunday
+        return CronRule(f"{minute} {hour} * * {','.join(str((WEEKDAYS.index(day) + 1) % 7) for day in days)}")
+    return CronRule(text)
+
+
+def unfolded_lines(f):
+    # Content lines of an iCalendar stream, continuation lines joined
+    line = None
+    for raw in f:
+        raw = raw.rstrip("\r\n")
+        if raw[:1] in (" ", "\t"):
+            if line is not None:
+                line += raw[1:]
+            continue
+        if line is not None:
+            yield line
+        line = raw
+    if line is not None:
+        yield line
+
+
+def parse_ics_time(params, value):
+    # DTSTART/EXDATE/UNTIL value -> datetime, naive for local time
+    if "VALUE=DATE" in params or len(value) == 8:
+        return datetime(int(value[:4]), int(value[4:6]), int(value[6:8]))
+    moment = datetime(int(value[:4]), int(value[4:6]), int(value[6:8]),
+                      int(value[9:11]), int(value[11:13]), int(value[13:15]))
+    if value.endswith("Z"):
+        return moment.replace(tzinfo=timezone.utc)
+    for param in params:
+        if param.startswith("TZID="):
+            zone = time_zone(param[5:].strip('"'))
+            if zone is not None:
+                return moment.replace(tzinfo=zone)
+    return moment
+
+
+ZONES = {}
+
+
+def time_zone(name):
+    # Unknown zones, or no tz database, fall back to local time
+    if name not in ZONES:
+        zone = None
+        try:
+            from zoneinfo import ZoneInfo
+            zone = ZoneInfo(name)
+        except (ImportError, KeyError, ValueError, OSError):
+            pass
+        ZONES[name] = zone
+    return ZONES[name]
+
+
+def epoch_ms(moment):
+    return int(moment.timestamp() * 1000)
+
+
+def add_months(year, month, count):
+    month += count - 1
+    return year + month // 12, month % 12 + 1
+
+
+def expand_rrule(start, rule, exdates, now_ms, horizon_ms):
+    # Occurrences of an RRULE from now_ms up to horizon_ms. Supports FREQ
+    # DAILY/WEEKLY/MONTHLY/YEARLY with INTERVAL, COUNT, UNTIL and, for
+    # WEEKLY, BYDAY; any other rule only yields its first occurrence.
+    parts = dict(part.split("=", 1) for part in rule.split(";") if "=" in part)
+    freq = parts.pop("FREQ", None)
+    interval = max(1, int(parts.pop("INTERVAL", 1)))
+    count = parts.pop("COUNT", None)
+    count = int(count) if count is not None else None
+    until = parts.pop("UNTIL", None)
+    until_ms = epoch_ms(parse_ics_time((), until)) if until else None
+    parts.pop("WKST", None)
+    weekdays = [start.weekday()]
+    if freq == "WEEKLY" and "BYDAY" in parts:
+        weekdays = sorted(ICS_WEEKDAYS[day] for day in parts.pop("BYDAY").split(",") if day in ICS_WEEKDAYS)
+    if freq not in ("DAILY", "WEEKLY", "MONTHLY", "YEARLY") or parts or not weekdays:
+        first_ms = epoch_ms(start)
+        if first_ms >= now_ms and first_ms not in exdates:
+            yield first_ms
+        return
+
+    wall = start.timetz()
+    first_day = start.date()
+    week_start = first_day - timedelta(days=first_day.weekday())
+    # Without COUNT whole periods before now can be skipped unseen
+    period = 0
+    if count is None:
+        today = datetime.fromtimestamp(now_ms / 1000, start.tzinfo).date()
+        if freq == "DAILY":
+            elapsed = (today - first_day).days
+        elif freq == "WEEKLY":
+            elapsed = (today - week_start).days // 7
+        elif freq == "MONTHLY":
+            elapsed = (today.year - first_day.year) * 12 + today.month - first_day.month
+        else:
+            elapsed = today.year - first_day.year
+        period = max(0, elapsed // interval - 1)
+
+    seen = 0
+    while True:
+        step = period * interval
+        if freq == "DAILY":
+            days = [first_day + timedelta(days=step)]
+        elif freq == "WEEKLY":
+            days = [week_start + timedelta(days=7 * step + weekday) for weekday in weekdays]
+        elif freq == "MONTHLY":
+            year, month = add_months(first_day.year, first_day.month, step)
+            days = [safe_date(year, month, first_day.day)]
+        else:
+            days = [safe_date(first_day.year + step, first_day.month, first_day.day)]
+        for day in days:
+            # Dates that don't exist (31 April, 29 February) are skipped
+            if day is None or day < first_day:
+                continue
+            occurrence_ms = epoch_ms(datetime.combine(day, wall))
+            if (count is not None and seen >= count) or (until_ms is not None and occurrence_ms > until_ms):
+                return
+            if occurrence_ms >= horizon_ms:
+                return
+            seen += 1
+            if occurrence_ms >= now_ms and occurrence_ms not in exdates:
+                yield occurrence_ms
+        period += 1
+
+
+def safe_date(year, month, day):
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def iter_ics_starts(f, now_ms, horizon_ms):
+    # Streams the start (epoch ms) of every upcoming occurrence in an
+    # iCalendar file; only the current event is held in memory
+    event = None
+    for line in unfolded_lines(f):
+        if line == "BEGIN:VEVENT":
+            event = {"exdates": set()}
+            continue
+        if event is None:
+            continue
+        if line == "END:VEVENT":
+            start = event.get("start")
+            if start is not None and not event.get("cancelled"):
+                if "rrule" in event:
+                    try:
+                        yield from list(expand_rrule(start, event["rrule"], event["exdates"],
+                                                     now_ms, horizon_ms))
+                    except (ValueError, OverflowError):
+                        pass
+                else:
+                    try:
+                        start_ms = epoch_ms(start)
+                    except (ValueError, OverflowError, OSError):
+                        # Out of range (year 1, or before 1970 on Windows)
+                        start_ms = None
+                    if start_ms is not None and start_ms >= now_ms:
+                        yield start_ms
+            event = None
+            continue
+        if not line.startswith(EVENT_PROPERTIES):
+            # SUMMARY, DESCRIPTION and the rest are never looked at
+            continue
+        name, _, value = line.partition(":")
+        name, *params = name.split(";")
+        try:
+            if name == "DTSTART":
+                event["start"] = parse_ics_time(params, value)
+            elif name == "RRULE":
+                event["rrule"] = value.upper()
+            elif name == "EXDATE":
+                event["exdates"].update(epoch_ms(parse_ics_time(params, v)) for v in value.split(","))
+            elif name == "STATUS":
+                event["cancelled"] = value.upper() == "CANCELLED"
+        except (ValueError, OverflowError, OSError):
+            # A malformed or out-of-range property drops just that event
+            event["start"] = None
+
+
+def cache_dir():
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "DesktopCountdown")
+
+
+class CalendarIndex:
+    # Sorted start times of a calendar's upcoming occurrences, so the next
+    # target is a bisect rather than a re-scan. Cached on disk, keyed by
+    # the file's path, size and mtime.
+    def __init__(self, starts, built_ms):
+        self.starts = starts
+        self.built_ms = built_ms
+
+    def __len__(self):
+        return len(self.starts)
+
+    def next_after(self, now_ms):
+        index = bisect_right(self.starts, now_ms)
+        return self.starts[index] if index < len(self.starts) else None
+
+    def is_stale(self, now_ms):
+        # Recurring events were only expanded up to the horizon
+        return now_ms - self.built_ms > HORIZON_MS // 2
+
+    @classmethod
+    def build(cls, path, now_ms):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            starts = sorted(iter_ics_starts(f, now_ms, now_ms + HORIZON_MS))
+        return cls(array("q", starts), now_ms)
+
+    @classmethod
+    def load(cls, path, now_ms, directory=None):
+        # From the cache when the file hasn't changed, else parsed and cached
+        path = os.path.abspath(path)
+        info = os.stat(path)
+        key = {"version": CACHE_VERSION, "path": path, "size": info.st_size, "mtime_ns": info.st_mtime_ns}
+        directory = directory or cache_dir()
+        cache_path = os.path.join(directory, hashlib.sha1(path.encode("utf-8")).hexdigest()[:16] + ".idx")
+        try:
+            with open(cache_path, "rb") as f:
+                header = json.loads(f.readline())
+                if all(header.get(name) == value for name, value in key.items()):
+                    starts = array("q")
+                    starts.frombytes(f.read())
+                    index = cls(starts, header["built_ms"])
+                    if not index.is_stale(now_ms):
+                        return index
+        except (OSError, ValueError, KeyError):
+            pass
+
+        index = cls.build(path, now_ms)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            def write(f):
+                f.write(json.dumps(dict(key, built_ms=index.built_ms)).encode("utf-8"))
+                f.write(b"\n")
+                index.starts.tofile(f)
+            write_atomic(cache_path, write, binary=True)
+        except OSError:
+            # Only the next start gets slower
+            pass
+        return index
+
+
+class Recurrence:
+    # Where the countdown goes after "时间到！": the next match of a rule,
+    # the next event of a calendar, whichever comes first
+    def __init__(self, rule="", calendar_file="", cache_directory=None):
+        self.rule = parse_rule(rule)
+        self.calendar_file = calendar_file
+        self.cache_directory = cache_directory
+        self.calendar = None
+
+    def next_after(self, now_ms):
+        candidates = []
+        if self.rule is not None:
+            candidates.append(self.rule.next_after(now_ms))
+        if self.calendar_file:
+            if self.calendar is None or self.calendar.is_stale(now_ms):
+                self.calendar = CalendarIndex.load(self.calendar_file, now_ms, self.cache_directory)
+            candidates.append(self.calendar.next_after(now_ms))
+        candidates = [target for target in candidates if target is not None]
+        return min(candidates) if candidates else None
@@ -0,0 +1,396 @@
+import heapq
+import itertools
+import math
+import random
+import time
+
+DAY_SECONDS = 86400
+# Wall and monotonic clocks may disagree by this much before it counts as a
+# jump; NTP slewing stays well below it
+JUMP_TOLERANCE_MS = 250
+# Longest sleep, so a jump or a resume from sleep is noticed within this
+# even in the day view
+MAX_SLEEP_MS = 60 * 1000
+# After time ran out right after a jump, keep checking this long for the
+# clock to be set back
+JUMP_GRACE_MS = 15 * 60 * 1000
+# With a recurring target, "时间到！" stays up this long before the next one
+FINISHED_HOLD_MS = 60 * 1000
+# Digits shown after the seconds in the precision mode: none, tenths, hundredths
+PRECISIONS = (0, 1, 2)
+
+
+def wall_clock_ms():
+    return int(time.time() * 1000)
+
+
+def monotonic_ms():
+    return int(time.monotonic() * 1000)
+
+
+def seconds_remaining(target_ms, now_ms):
+    # Whole seconds, truncated towards zero like QDateTime.secsTo
+    remaining_ms = target_ms - now_ms
+    if remaining_ms >= 0:
+        return remaining_ms // 1000
+    return -(-remaining_ms // 1000)
+
+
+def format_remaining(seconds_remaining):
+    if seconds_remaining <= 0:
+        return "时间到！"
+    elif seconds_remaining > DAY_SECONDS:
+        days = seconds_remaining // DAY_SECONDS
+        return f"{days}天"
+    hours = seconds_remaining // 3600
+    minutes = (seconds_remaining % 3600) // 60
+    seconds = seconds_remaining % 60
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+def format_remaining_ms(remaining_ms, precision=0):
+    # HH:MM:SS plus `precision` digits of the second, truncated like the
+    # seconds. The day view and "时间到！" have no fraction; "时间到！" comes
+    # with the last second, as in the other modes, so the window agrees
+    # with the status endpoint and the 0 milestone.
+    unit_ms = 10 ** (3 - precision)
+    seconds = remaining_ms // 1000
+    if not precision or seconds <= 0 or seconds > DAY_SECONDS:
+        return format_remaining(seconds)
+    fraction = remaining_ms % 1000 // unit_ms
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}.{fraction:0{precision}d}"
+
+
+class TimeBase:
+    # Wall-clock time carried forward on the monotonic clock since the last
+    # sync. A larger disagreement than JUMP_TOLERANCE_MS means the wall clock
+    # was stepped (NTP, by hand) or the machine slept, and re-syncs to the
+    # wall clock. A SimulatedClock provides both clocks.
+    def __init__(self, clock=wall_clock_ms, monotonic=None):
+        self.wall = clock
+        self.monotonic = monotonic or getattr(clock, "monotonic", monotonic_ms)
+        self.base = None
+        self.jumps = 0
+        self.last_jump_ms = 0
+        self.jump_mono = None
+
+    def __call__(self):
+        wall = self.wall()
+        mono = self.monotonic()
+        if self.base is not None:
+            estimate = self.base[0] + mono - self.base[1]
+            if abs(wall - estimate) <= JUMP_TOLERANCE_MS:
+                return estimate
+            self.jumps += 1
+            self.last_jump_ms = wall - estimate
+            self.jump_mono = mono
+        self.base = (wall, mono)
+        return wall
+
+    def recently_jumped(self):
+        return self.jump_mono is not None and self.monotonic() - self.jump_mono < JUMP_GRACE_MS
+
+
+class TickScheduler:
+    # Computes the wakeup times for a countdown to an epoch target (ms).
+    # Every wakeup is aligned to the millisecond at which the displayed
+    # second changes, so a late timer never accumulates drift.
+    # In adaptive mode it only wakes when the displayed text changes,
+    # i.e. once a day in the day view, plus a clock check every MAX_SLEEP_MS.
+    # With a precision, the clock view changes every tenth or hundredth of a
+    # second instead, but wakes at most once per frame_ms.
+    # Time is read through a TimeBase, so wall-clock jumps are noticed.
+    def __init__(self, target_ms, clock=wall_clock_ms, adaptive=False, precision=0):
+        self.use_clock(clock)
+        self.adaptive = adaptive
+        self.precision = None
+        self.set_precision(precision)
+        self.frame_ms = 0
+        self.remaining_ms = None
+        self.ticks = 0
+        self.last_drift_ms = 0
+        self.max_drift_ms = 0
+        self.total_drift_ms = 0
+        self.early_wakeups = 0
+        self.wakeups_avoided = 0
+        self.clock_checks = 0
+        self.set_target(target_ms)
+
+    def use_clock(self, clock):
+        # A wall clock, or a TimeBase shared with other schedulers
+        self.clock = clock if isinstance(clock, TimeBase) else TimeBase(clock)
+        self.check_ms = None
+        self.seen_jumps = self.clock.jumps
+
+    def set_precision(self, precision):
+        if precision == self.precision:
+            return
+        self.precision = precision
+        self.unit_ms = 10 ** (3 - precision)
+        # The text changes format, so the next tick redraws it
+        self.last_key = None
+    
+    def set_frame_rate(self, hz):
+        # Refresh rate of the screen, the most wakeups per second worth making
+        self.frame_ms = math.ceil(1000 / hz) if hz else 0
+    
+    def set_target(self, target_ms):
+        self.target_ms = target_ms
+        self.deadline_ms = None
+        self.last_seconds = None
+        self.last_key = None
+        self.pending_avoided = 0
+        self.suspended = False
+
+    def change_threshold(self, seconds):
+        # Smallest remaining-seconds value that still shows the same text
+        if seconds <= 0:
+            return None
+        if self.adaptive and seconds > DAY_SECONDS:
+            return max(seconds // DAY_SECONDS * DAY_SECONDS, DAY_SECONDS + 1)
+        return seconds
+
+    def display_key(self, seconds):
+        # Equal keys mean equal text on screen
+        if seconds <= 0:
+            return 0
+        return self.change_threshold(seconds)
+
+    def tick(self):
+        # Returns (seconds_remaining, changed) for the current clock reading
+        # Jumps since the last tick, including ones first noticed by another
+        # read of the clock (delay_ms(), or another scheduler on a shared TimeBase)
+        now = self.clock()
+        jumped = self.clock.jumps != self.seen_jumps
+        self.seen_jumps = self.clock.jumps
+        check_ms, self.check_ms = self.check_ms, None
+        early = False
+        if self.deadline_ms is not None and not jumped:
+            drift = now - self.deadline_ms
+            if drift < 0:
+                if check_ms is not None and now >= check_ms:
+                    self.clock_checks += 1
+                else:
+                    self.early_wakeups += 1
+                early = True
+            else:
+                self.ticks += 1
+                self.last_drift_ms = drift
+                self.max_drift_ms = max(self.max_drift_ms, drift)
+                self.total_drift_ms += drift
+                self.wakeups_avoided += self.pending_avoided
+
+        remaining_ms = self.target_ms - now
+        self.remaining_ms = remaining_ms
+        seconds = seconds_remaining(self.target_ms, now)
+        if self.suspended:
+            # A per-second timer would have woken for every change missed
+            self.suspended = False
+            if self.last_seconds is not None and not jumped:
+                self.wakeups_avoided += max(0, self.last_seconds - max(seconds, 0) - 1)
+
+        if self.unit_ms < 1000 and 0 < seconds <= DAY_SECONDS:
+            # Fractions of a second: wake at the next change, but not
+            # within a frame of the last one. An early wakeup keeps its
+            # deadline, as nothing was drawn, unless the deadline is further
+            # off than the next change could be.
+            units = remaining_ms // self.unit_ms
+            key = (units,)
+            changed = key != self.last_key
+            self.last_seconds = seconds
+            self.last_key = key
+            if not early or self.deadline_ms > now + self.unit_ms + self.frame_ms:
+                self.deadline_ms = max(self.target_ms - units * self.unit_ms + 1, now + self.frame_ms)
+            self.pending_avoided = 0
+            return seconds, changed
+
+        key = self.display_key(seconds)
+        changed = key != self.last_key
+        self.last_seconds = seconds
+        self.last_key = key
+
+        threshold = self.change_threshold(seconds)
+        if threshold is None:
+            self.deadline_ms = None
+            self.pending_avoided = 0
+        else:
+            # First millisecond at which seconds_remaining() drops below threshold
+            self.deadline_ms = self.target_ms - threshold * 1000 + 1
+            if not early:
+                self.pending_avoided = seconds - threshold
+        return seconds, changed
+
+    def suspend(self):
+        # Stop waking until the next tick(), e.g. while the window is hidden
+        self.deadline_ms = None
+        self.pending_avoided = 0
+        self.suspended = True
+
+    def delay_ms(self):
+        # Milliseconds until the next wakeup, or None once the countdown is over
+        now = self.clock()
+        if self.deadline_ms is None:
+            if (self.suspended or self.last_seconds is None or self.last_seconds > 0
+                    or not self.clock.recently_jumped()):
+                return None
+            # Time may only have run out because the clock jumped ahead
+            delay = MAX_SLEEP_MS
+        else:
+            delay = max(0, self.deadline_ms - now)
+        if delay >= MAX_SLEEP_MS:
+            delay = MAX_SLEEP_MS
+            self.check_ms = now + delay
+        return delay
+
+    def stats(self):
+        mean = self.total_drift_ms / self.ticks if self.ticks else 0.0
+        return {
+            "ticks": self.ticks,
+            "early_wakeups": self.early_wakeups,
+            "wakeups_avoided": self.wakeups_avoided,
+            "last_drift_ms": self.last_drift_ms,
+            "max_drift_ms": self.max_drift_ms,
+            "mean_drift_ms": round(mean, 3),
+            "clock_checks": self.clock_checks,
+            "clock_jumps": self.clock.jumps,
+            "last_jump_ms": self.clock.last_jump_ms,
+        }
+
+
+class CountdownQueue:
+    # Many countdowns sharing one wakeup. A min-heap ordered by the time each
+    # countdown's text next changes means a wakeup only touches the
+    # countdowns that actually change.
+    def __init__(self, clock=wall_clock_ms, adaptive=True):
+        # One TimeBase for all, so every countdown sees the same time
+        self.clock = TimeBase(clock)
+        self.adaptive = adaptive
+        self.schedulers = {}
+        self.heap = []
+        self.counter = itertools.count()
+
+    def __len__(self):
+        return len(self.schedulers)
+
+    def add(self, key, target_ms):
+        scheduler = TickScheduler(target_ms, self.clock, adaptive=self.adaptive)
+        self.schedulers[key] = scheduler
+        scheduler.tick()
+        self.push(key, scheduler)
+
+    def remove(self, key):
+        # Its heap entry is dropped lazily when it reaches the top
+        self.schedulers.pop(key, None)
+
+    def seconds(self, key):
+        return self.schedulers[key].last_seconds
+
+    def push(self, key, scheduler):
+        if scheduler.deadline_ms is not None:
+            heapq.heappush(self.heap, (scheduler.deadline_ms, next(self.counter), key, scheduler))
+
+    def is_stale(self, entry):
+        deadline, _, key, scheduler = entry
+        return self.schedulers.get(key) is not scheduler or scheduler.deadline_ms != deadline
+
+    def next_deadline_ms(self):
+        while self.heap and self.is_stale(self.heap[0]):
+            heapq.heappop(self.heap)
+        return self.heap[0][0] if self.heap else None
+
+    def delay_ms(self):
+        deadline = self.next_deadline_ms()
+        if deadline is None:
+            return None
+        return min(max(0, deadline - self.clock()), MAX_SLEEP_MS)
+
+    def advance(self):
+        # Ticks every countdown that is due and returns the keys whose text changed
+        jumps = self.clock.jumps
+        now = self.clock()
+        if self.clock.jumps != jumps:
+            # Every deadline moved with the clock: re-tick all and rebuild
+            changed = [key for key, scheduler in self.schedulers.items() if scheduler.tick()[1]]
+            self.heap = []
+            for key, scheduler in self.schedulers.items():
+                self.push(key, scheduler)
+            return changed
+        changed = []
+        # A jump noticed by one of the ticks is handled on the next advance()
+        while self.heap and self.heap[0][0] <= now and self.clock.jumps == jumps:
+            entry = heapq.heappop(self.heap)
+            if self.is_stale(entry):
+                continue
+            key, scheduler = entry[2], entry[3]
+            _, key_changed = scheduler.tick()
+            if key_changed:
+                changed.append(key)
+            self.push(key, scheduler)
+        return changed
+
+
+class SimulatedClock:
+    # Wall clock plus a monotonic clock that only differs from it by the
+    # jumps and sleeps applied
+    def __init__(self, now_ms=0):
+        self.now_ms = now_ms
+        self.offset_ms = 0
+
+    def __call__(self):
+        return self.now_ms
+
+    def monotonic(self):
+        return self.now_ms - self.offset_ms
+
+    def advance(self, ms):
+        self.now_ms += ms
+
+    def jump(self, ms):
+        # The wall clock is set forward or back
+        self.now_ms += ms
+        self.offset_ms += ms
+
+    def sleep(self, ms):
+        # The machine is suspended; the monotonic clock stands still
+        self.jump(ms)
+
+
+def simulate(duration_ms, target_ms=None, start_ms=0, late_ms=0, early_ms=0,
+             adaptive=False, seed=0):
+    # Drives a TickScheduler with a simulated clock and a timer that fires
+    # up to `late_ms` late or `early_ms` early, and checks what was shown.
+    if target_ms is None:
+        target_ms = start_ms + duration_ms
+    clock = SimulatedClock(start_ms)
+    scheduler = TickScheduler(target_ms, clock, adaptive=adaptive)
+    rng = random.Random(seed)
+
+    shown = []
+    seconds, changed = scheduler.tick()
+    shown.append(seconds)
+    wakeups = 1
+    while clock.now_ms - start_ms < duration_ms:
+        delay = scheduler.delay_ms()
+        if delay is None:
+            break
+        clock.advance(max(0, delay + rng.randint(-early_ms, late_ms)))
+        seconds, changed = scheduler.tick()
+        wakeups += 1
+        if changed:
+            shown.append(seconds)
+
+    skipped = 0
+    duplicated = 0
+    for previous, current in zip(shown, shown[1:]):
+        expected = scheduler.display_key(scheduler.change_threshold(previous) - 1)
+        if scheduler.display_key(current) == scheduler.display_key(previous):
+            duplicated += 1
+        elif scheduler.display_key(current) != expected:
+            skipped += 1
+    return {
+        "wakeups": wakeups,
+        "updates": len(shown),
+        "skipped": skipped,
+        "duplicated": duplicated,
+        "scheduler": scheduler.stats(),
+    }
@@ -0,0 +1,466 @@
+import sys
+import os
+from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout,
+                            QLabel, QPushButton, QDateTimeEdit, QLineEdit,
+                            QCheckBox, QGroupBox, QMessageBox, QRadioButton,
+                            QSlider, QColorDialog, QFileDialog)
+from PyQt5.QtCore import Qt, QTimer
+
+from config import is_valid_color
+from recurrence import parse_rule
+
+# Registered for auto-start, the entry script next to this module
+SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tool.py")
+
+class SettingsWindow(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.parent = parent
+        self.setWindowTitle("倒计时设置")
+        self.setWindowFlags(Qt.Window)
+        self.setMinimumSize(500, 500)
+        
+        # Load settings
+        self.config = parent.config
+        self.load_settings()
+        
+        # Live preview on the countdown window, at most one restyle per frame
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.timeout.connect(self.apply_preview)
+        
+        # Initialize UI
+        self.init_ui()
+        self.center_on_screen()
+        
+        for signal in (self.color_input.textChanged, self.text_color_input.textChanged,
+                       self.font_size_slider.valueChanged, self.opacity_slider.valueChanged):
+            signal.connect(self.schedule_preview)
+    
+    def refresh(self):
+        # The window is reused, so show the current settings on every open
+        self.load_settings()
+        self.text_input.setText(self.display_text)
+        self.datetime_edit.setDateTime(self.target_time)
+        self.precision_radios[self.precision].setChecked(True)
+        self.recurrence_input.setText(self.recurrence)
+        self.calendar_input.setText(self.calendar_file)
+        self.color_input.setText(self.bg_color)
+        self.text_color_input.setText(self.text_color)
+        self.font_size_slider.setValue(self.font_size)
+        self.opacity_slider.setValue(self.bg_opacity)
+        if self.alignment == "center":
+            self.center_radio.setChecked(True)
+        elif self.alignment == "bottom_right":
+            self.bottom_right_radio.setChecked(True)
+        elif self.alignment == "top_right":
+            self.top_right_radio.setChecked(True)
+        else:
+            self.free_radio.setChecked(True)
+        self.mirror_screens_check.setChecked(self.mirror_screens)
+        self.auto_start_check.setChecked(self.auto_start)
+        self.auto_continue_check.setChecked(self.auto_continue)
+        self.auto_wallpaper_check.setChecked(self.auto_wallpaper)
+        self.adaptive_tick_check.setChecked(self.adaptive_tick)
+        self.preview_timer.stop()
+    
+    def schedule_preview(self):
+        if not self.preview_timer.isActive():
+            screen = self.parent.screen()
+            refresh_rate = screen.refreshRate() if screen is not None else 60
+            self.preview_timer.start(max(1, int(1000 / (refresh_rate or 60))))
+    
+    def apply_preview(self):
+        bg_color = self.color_input.text()
+        text_color = self.text_color_input.text()
+        if is_valid_color(bg_color) and is_valid_color(text_color):
+            self.parent.preview_style(bg_color, text_color,
+                                      self.font_size_slider.value(), self.opacity_slider.value())
+    
+    def hideEvent(self, event):
+        # Drop an unsaved preview; after saving this restyles from the new settings
+        super().hideEvent(event)
+        self.preview_timer.stop()
+        self.parent.update_label_style()
+    
+    def load_settings(self):
+        self.display_text = self.config.display_text
+        self.target_time = self.config.target_time
+        self.auto_start = self.config.auto_start
+        self.auto_continue = self.config.auto_continue
+        self.bg_opacity = self.config.bg_opacity
+        self.bg_color = self.config.bg_color
+        self.text_color = self.config.text_color
+        self.font_size = self.config.font_size
+        self.alignment = self.config.alignment
+        self.mirror_screens = self.config.mirror_screens
+        self.auto_wallpaper = self.config.auto_wallpaper
+        self.adaptive_tick = self.config.adaptive_tick
+        self.precision = self.config.precision
+        self.recurrence = self.config.recurrence
+        self.calendar_file = self.config.calendar_file
+    
+    def init_ui(self):
+        main_layout = QVBoxLayout()
+        main_layout.setContentsMargins(20, 20, 20, 20)
+        main_layout.setSpacing(15)
+        
+        # Display text
+        text_group = QHBoxLayout()
+        text_label = QLabel("显示文字：")
+        text_label.setStyleSheet("font-size: 16px;")
+        self.text_input = QLineEdit(self.display_text)
+        self.text_input.setStyleSheet("font-size: 16px; padding: 8px;")
+        text_group.addWidget(text_label)
+        text_group.addWidget(self.text_input)
+        main_layout.addLayout(text_group)
+        
+        # Target time
+        datetime_group = QHBoxLayout()
+        datetime_label = QLabel("目标时间：")
+        datetime_label.setStyleSheet("font-size: 16px;")
+        self.datetime_edit = QDateTimeEdit(self.target_time)
+        self.datetime_edit.setDisplayFormat("yyyy-MM-dd HH:mm:ss")
+        self.datetime_edit.setCalendarPopup(True)
+        self.datetime_edit.setStyleSheet("font-size: 16px; padding: 8px;")
+        datetime_group.addWidget(datetime_label)
+        datetime_group.addWidget(self.datetime_edit)
+        main_layout.addLayout(datetime_group)
+        
+        # Digits after the seconds, for cues that need tenths or hundredths
+        precision_group = QHBoxLayout()
+        precision_label = QLabel("精度：")
+        precision_label.setStyleSheet("font-size: 16px;")
+        precision_group.addWidget(precision_label)
+        self.precision_radios = []
+        for text in ("秒", "0.1 秒", "0.01 秒"):
+            radio = QRadioButton(text)
+            self.precision_radios.append(radio)
+            precision_group.addWidget(radio)
+        self.precision_radios[self.precision].setChecked(True)
+        precision_group.addStretch()
+        main_layout.addLayout(precision_group)
+        
+        # Next target after "时间到！": a rule, a calendar, or both
+        recurrence_group = QHBoxLayout()
+        recurrence_label = QLabel("重复：")
+        recurrence_label.setStyleSheet("font-size: 16px;")
+        self.recurrence_input = QLineEdit(self.recurrence)
+        self.recurrence_input.setPlaceholderText("daily 08:00 / weekly mon,fri 08:00 / 0 8 * * 1-5")
+        self.recurrence_input.setStyleSheet("font-size: 16px; padding: 8px;")
+        recurrence_group.addWidget(recurrence_label)
+        recurrence_group.addWidget(self.recurrence_input)
+        main_layout.addLayout(recurrence_group)
+        
+        calendar_group = QHBoxLayout()
+        calendar_label = QLabel("日历：")
+        calendar_label.setStyleSheet("font-size: 16px;")
+        self.calendar_input = QLineEdit(self.calendar_file)
+        self.calendar_input.setPlaceholderText("导入 .ics 文件中的日程")
+        self.calendar_input.setStyleSheet("font-size: 16px; padding: 8px;")
+        calendar_picker_btn = QPushButton("导入")
+        calendar_picker_btn.clicked.connect(self.pick_calendar_file)
+        calendar_group.addWidget(calendar_label)
+        calendar_group.addWidget(self.calendar_input)
+        calendar_group.addWidget(calendar_picker_btn)
+        main_layout.addLayout(calendar_group)
+        
+        # Theme settings
+        theme_group = QGroupBox("主题设置")
+        theme_layout = QVBoxLayout()
+        
+        # Background color
+        color_layout = QHBoxLayout()
+        color_label = QLabel("背景颜色(R,G,B):")
+        self.color_input = QLineEdit(self.bg_color)
+        color_picker_btn = QPushButton("选择")
+        color_picker_btn.clicked.connect(self.pick_bg_color)
+        color_layout.addWidget(color_label)
+        color_layout.addWidget(self.color_input)
+        color_layout.addWidget(color_picker_btn)
+        theme_layout.addLayout(color_layout)
+        
+        # Text color
+        text_color_layout = QHBoxLayout()
+        text_color_label = QLabel("文字颜色(R,G,B):")
+        self.text_color_input = QLineEdit(self.text_color)
+        text_color_picker_btn = QPushButton("选择")
+        text_color_picker_btn.clicked.connect(self.pick_text_color)
+        text_color_layout.addWidget(text_color_label)
+        text_color_layout.addWidget(self.text_color_input)
+        text_color_layout.addWidget(text_color_picker_btn)
+        theme_layout.addLayout(text_color_layout)
+        
+        # Font size
+        font_size_layout = QHBoxLayout()
+        font_size_label = QLabel(f"字体大小({self.font_size}px):")
+        self.font_size_slider = QSlider(Qt.Horizontal)
+        self.font_size_slider.setRange(12, 72)
+        self.font_size_slider.setValue(self.font_size)
+        self.font_size_slider.valueChanged.connect(
+            lambda v: font_size_label.setText(f"字体大小({v}px):"))
+        font_size_layout.addWidget(font_size_label)
+        font_size_layout.addWidget(self.font_size_slider)
+        theme_layout.addLayout(font_size_layout)
+        
+        # Opacity slider
+        opacity_layout = QHBoxLayout()
+        opacity_label = QLabel(f"透明度({self.bg_opacity}):")
+        self.opacity_slider = QSlider(Qt.Horizontal)
+        self.opacity_slider.setRange(0, 255)
+        self.opacity_slider.setValue(self.bg_opacity)
+        self.opacity_slider.valueChanged.connect(
+            lambda v: opacity_label.setText(f"透明度({v}):"))
+        opacity_layout.addWidget(opacity_label)
+        opacity_layout.addWidget(self.opacity_slider)
+        theme_layout.addLayout(opacity_layout)
+        
+        # Theme presets
+        theme_preset_layout = QHBoxLayout()
+        dark_btn = QPushButton("深色主题")
+        light_btn = QPushButton("浅色主题")
+        blue_btn = QPushButton("蓝色主题")
+        
+        dark_btn.clicked.connect(lambda: self.set_theme_preset("40,40,40", "255,255,255", 42, 200))
+        light_btn.clicked.connect(lambda: self.set_theme_preset("220,220,220", "0,0,0", 42, 180))
+        blue_btn.clicked.connect(lambda: self.set_theme_preset("30,80,150", "255,255,255", 42, 180))
+        
+        theme_preset_layout.addWidget(dark_btn)
+        theme_preset_layout.addWidget(light_btn)
+        theme_preset_layout.addWidget(blue_btn)
+        theme_layout.addLayout(theme_preset_layout)
+        
+        theme_group.setLayout(theme_layout)
+        main_layout.addWidget(theme_group)
+        
+        # Window position
+        pos_group = QGroupBox("窗口位置")
+        pos_layout = QVBoxLayout()
+        
+        self.center_radio = QRadioButton("居中对齐")
+        self.bottom_right_radio = QRadioButton("右下对齐")
+        self.top_right_radio = QRadioButton("右上对齐")
+        self.free_radio = QRadioButton("自由放置（拖动窗口，每块屏幕记住位置）")
+        
+        if self.alignment == "center":
+            self.center_radio.setChecked(True)
+        elif self.alignment == "bottom_right":
+            self.bottom_right_radio.setChecked(True)
+        elif self.alignment == "top_right":
+            self.top_right_radio.setChecked(True)
+        else:
+            self.free_radio.setChecked(True)
+            
+        pos_layout.addWidget(self.center_radio)
+        pos_layout.addWidget(self.bottom_right_radio)
+        pos_layout.addWidget(self.top_right_radio)
+        pos_layout.addWidget(self.free_radio)
+        self.mirror_screens_check = QCheckBox("在每块屏幕上显示")
+        self.mirror_screens_check.setChecked(self.mirror_screens)
+        pos_layout.addWidget(self.mirror_screens_check)
+        pos_group.setLayout(pos_layout)
+        main_layout.addWidget(pos_group)
+        
+        # Auto settings
+        auto_group = QGroupBox("自动设置")
+        auto_layout = QVBoxLayout()
+        
+        self.auto_start_check = QCheckBox("开机自启动")
+        self.auto_start_check.setChecked(self.auto_start)
+        self.auto_continue_check = QCheckBox("自动继续未完成计时")
+        self.auto_continue_check.setChecked(self.auto_continue)
+        self.auto_wallpaper_check = QCheckBox("自动适应壁纸颜色")
+        self.auto_wallpaper_check.setChecked(self.auto_wallpaper)
+        self.adaptive_tick_check = QCheckBox("节能刷新（仅在显示变化时唤醒）")
+        self.adaptive_tick_check.setChecked(self.adaptive_tick)
+        
+        auto_layout.addWidget(self.auto_start_check)
+        auto_layout.addWidget(self.auto_continue_check)
+        auto_layout.addWidget(self.auto_wallpaper_check)
+        auto_layout.addWidget(self.adaptive_tick_check)
+        auto_group.setLayout(auto_layout)
+        main_layout.addWidget(auto_group)
+        
+        # Buttons
+        button_layout = QHBoxLayout()
+        self.save_button = QPushButton("保存设置")
+        self.save_button.setStyleSheet("font-size: 16px; padding: 8px;")
+        self.save_button.clicked.connect(self.save_settings)
+        
+        self.cancel_button = QPushButton("取消")
+        self.cancel_button.setStyleSheet("font-size: 16px; padding: 8px;")
+        self.cancel_button.clicked.connect(self.close)
+        
+        self.list_button = QPushButton("多个倒计时")
+        self.list_button.setStyleSheet("font-size: 16px; padding: 8px;")
+        self.list_button.clicked.connect(self.parent.show_list_window)
+        
+        button_layout.addWidget(self.list_button)
+        button_layout.addWidget(self.save_button)
+        button_layout.addWidget(self.cancel_button)
+        main_layout.addLayout(button_layout)
+        
+        self.setLayout(main_layout)
+        
+        # Window style
+        self.setStyleSheet("""
+            QWidget {
+                font-family: "Microsoft YaHei";
+            }
+            QPushButton {
+                padding: 10px;
+                background-color: #4CAF50;
+                color: white;
+                border: none;
+                border-radius: 5px;
+                min-width: 80px;
+                font-size: 16px;
+            }
+            QPushButton:hover {
+                background-color: #45a049;
+            }
+            QLineEdit, QDateTimeEdit {
+                padding: 10px;
+                border: 1px solid #ccc;
+                border-radius: 4px;
+                font-size: 16px;
+                min-width: 200px;
+            }
+            /* Not on QDateTimeEdit: with Fusion (Qt 5.15) a styled background
+               there leaks ~10 KB per repaint; its base is white anyway */
+            QLineEdit {
+                background-color: white;
+            }
+            QCheckBox::indicator {
+                width: 20px;
+                height: 20px;
+            }
+            QGroupBox {
+                border: 1px solid gray;
+                border-radius: 5px;
+                margin-top: 10px;
+                padding-top: 15px;
+                font-size: 16px;
+            }
+            QGroupBox::title {
+                subcontrol-origin: margin;
+                left: 10px;
+                padding: 0 3px;
+            }
+        """)
+    
+    def pick_bg_color(self):
+        color = QColorDialog.getColor()
+        if color.isValid():
+            self.color_input.setText(f"{color.red()},{color.green()},{color.blue()}")
+    
+    def pick_text_color(self):
+        color = QColorDialog.getColor()
+        if color.isValid():
+            self.text_color_input.setText(f"{color.red()},{color.green()},{color.blue()}")
+    
+    def pick_calendar_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "导入日历", "", "iCalendar (*.ics);;所有文件 (*)")
+        if path:
+            self.calendar_input.setText(path)
+    
+    def set_theme_preset(self, bg_color, text_color, font_size, opacity):
+        self.color_input.setText(bg_color)
+        self.text_color_input.setText(text_color)
+        self.font_size_slider.setValue(font_size)
+        self.opacity_slider.setValue(opacity)
+    
+    def save_settings(self):
+        # Validate inputs
+        try:
+            if not is_valid_color(self.color_input.text()):
+                raise ValueError("背景颜色格式应为R,G,B (0-255)")
+            if not is_valid_color(self.text_color_input.text()):
+                raise ValueError("文字颜色格式应为R,G,B (0-255)")
+            parse_rule(self.recurrence_input.text())
+            calendar_file = self.calendar_input.text().strip()
+            if calendar_file and not os.path.isfile(calendar_file):
+                raise ValueError(f"找不到日历文件: {calendar_file}")
+        except ValueError as e:
+            QMessageBox.warning(self, "输入错误", str(e))
+            return
+        
+        # Save settings
+        self.display_text = self.text_input.text()
+        self.target_time = self.datetime_edit.dateTime()
+        self.auto_start = self.auto_start_check.isChecked()
+        self.auto_continue = self.auto_continue_check.isChecked()
+        self.auto_wallpaper = self.auto_wallpaper_check.isChecked()
+        self.adaptive_tick = self.adaptive_tick_check.isChecked()
+        self.precision = next(i for i, radio in enumerate(self.precision_radios) if radio.isChecked())
+        self.bg_color = self.color_input.text()
+        self.text_color = self.text_color_input.text()
+        self.font_size = self.font_size_slider.value()
+        self.bg_opacity = self.opacity_slider.value()
+        self.recurrence = self.recurrence_input.text().strip()
+        self.calendar_file = calendar_file
+        
+        if self.center_radio.isChecked():
+            self.alignment = "center"
+        elif self.bottom_right_radio.isChecked():
+            self.alignment = "bottom_right"
+        elif self.top_right_radio.isChecked():
+            self.alignment = "top_right"
+        else:
+            self.alignment = "free"
+        self.mirror_screens = self.mirror_screens_check.isChecked()
+        
+        values = dict(
+            display_text=self.display_text,
+            target_time=self.target_time,
+            auto_start=self.auto_start,
+            auto_continue=self.auto_continue,
+            auto_wallpaper=self.auto_wallpaper,
+            adaptive_tick=self.adaptive_tick,
+            precision=self.precision,
+            bg_color=self.bg_color,
+            text_color=self.text_color,
+            font_size=self.font_size,
+            bg_opacity=self.bg_opacity,
+            alignment=self.alignment,
+            mirror_screens=self.mirror_screens,
+            recurrence=self.recurrence,
+            calendar_file=self.calendar_file,
+        )
+        
+        # A new alignment replaces the dragged position
+        if self.alignment != self.config.alignment:
+            values["window_pos"] = None
+        
+        # One batched write; the main window refreshes what changed
+        self.config.update(**values)
+        
+        # Set auto-start
+        self.set_auto_start(self.auto_start)
+        
+        QMessageBox.information(self, "提示", "设置已保存！")
+        self.close()
+    
+    def set_auto_start(self, enable):
+        if sys.platform == "win32":
+            import winreg
+            key = winreg.HKEY_CURRENT_USER
+            subkey = r"Software\Microsoft\Windows\CurrentVersion\Run"
+            try:
+                with winreg.OpenKey(key, subkey, 0, winreg.KEY_WRITE) as reg_key:
+                    if enable:
+                        winreg.SetValueEx(reg_key, "DesktopCountdown", 0, winreg.REG_SZ, 
+                                        f'"{sys.executable}" "{SCRIPT_PATH}"')
+                    else:
+                        try:
+                            winreg.DeleteValue(reg_key, "DesktopCountdown")
+                        except WindowsError:
+                            pass
+            except WindowsError:
+                QMessageBox.warning(self, "警告", "无法设置开机自启动！")
+    
+    def center_on_screen(self):
+        screen_geometry = QApplication.desktop().availableGeometry()
+        window_geometry = self.frameGeometry()
+        window_geometry.moveCenter(screen_geometry.center())
+        self.move(window_geometry.topLeft())
@@ -0,0 +1,75 @@
+import getpass
+import hashlib
+import json
+from PyQt5.QtCore import QObject, QSettings, pyqtSignal
+from PyQt5.QtNetwork import QLocalServer, QLocalSocket
+
+CONNECT_TIMEOUT_MS = 200
+
+
+def server_name():
+    # One instance per user and settings store
+    settings_file = QSettings("CountdownApp", "DesktopCountdown").fileName()
+    digest = hashlib.sha1(f"{getpass.getuser()}:{settings_file}".encode("utf-8")).hexdigest()
+    return f"DesktopCountdown-{digest[:16]}"
+
+
+def send_message(message, name=None):
+    # Hands `message` to a running instance; False when there is none
+    socket = QLocalSocket()
+    socket.connectToServer(name or server_name())
+    if not socket.waitForConnected(CONNECT_TIMEOUT_MS):
+        return False
+    socket.write(json.dumps(message).encode("utf-8") + b"\n")
+    sent = socket.waitForBytesWritten(CONNECT_TIMEOUT_MS)
+    socket.disconnectFromServer()
+    return sent
+
+
+class InstanceServer(QObject):
+    # Listens for later launches and emits what they were started with
+    message_received = pyqtSignal(dict)
+
+    def __init__(self, name=None, parent=None):
+        super().__init__(parent)
+        self.name = name or server_name()
+        self.server = QLocalServer(self)
+        self.server.newConnection.connect(self.accept)
+        self.buffers = {}
+
+    def listen(self):
+        # False when another instance is already listening
+        if self.server.listen(self.name):
+            return True
+        probe = QLocalSocket()
+        probe.connectToServer(self.name)
+        if probe.waitForConnected(CONNECT_TIMEOUT_MS):
+            probe.disconnectFromServer()
+            return False
+        # Left behind by a crashed instance (Unix sockets outlive the process)
+        QLocalServer.removeServer(self.name)
+        return self.server.listen(self.name)
+
+    def accept(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            self.buffers[socket] = b""
+            socket.readyRead.connect(lambda socket=socket: self.read(socket))
+            socket.disconnected.connect(lambda socket=socket: self.close(socket))
+
+    def read(self, socket):
+        self.buffers[socket] += bytes(socket.readAll())
+        while b"\n" in self.buffers[socket]:
+            line, self.buffers[socket] = self.buffers[socket].split(b"\n", 1)
+            try:
+                message = json.loads(line.decode("utf-8"))
+            except ValueError:
+                continue
+            if isinstance(message, dict):
+                self.message_received.emit(message)
+
+    def close(self, socket):
+        if socket in self.buffers:
+            self.read(socket)
+            del self.buffers[socket]
+        socket.deleteLater()
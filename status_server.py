@@ -0,0 +1,207 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+from scheduler import wall_clock_ms
+
+HOST = "127.0.0.1"
+# Entry point that starts the child process of StatusProcess
+TOOL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tool.py")
+# Long-poll requests are answered after at most this many seconds
+WAIT_TIMEOUT = 30.0
+MAX_WAIT_TIMEOUT = 300.0
+# Request line plus headers; anything bigger is not one of our clients
+MAX_HEADER_BYTES = 8192
+
+
+def snapshot(target_ms, seconds, text, now_ms=None):
+    # What the endpoint serves. seconds_remaining is as of updated_ms, which
+    # only moves when the displayed text changes (once a day in the day
+    # view with adaptive ticks); use target_ms for finer math.
+    return {
+        "target_ms": target_ms,
+        "seconds_remaining": seconds,
+        "text": text,
+        "updated_ms": wall_clock_ms() if now_ms is None else now_ms,
+    }
+
+
+def http_response(status, body, keep_alive):
+    head = (f"HTTP/1.1 {status}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Cache-Control: no-store\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("ascii") + body
+
+
+class StatusServer:
+    # Local HTTP endpoint with the countdown state as JSON:
+    #   GET /status                    the current state
+    #   GET /status?wait=<version>     long-poll until the version changes
+    # publish() may be called from any thread; the response bytes are built
+    # once per change on the server's loop and shared by every client.
+    def __init__(self, port=0, host=HOST):
+        self.host = host
+        self.port = port
+        self.loop = None
+        self.server = None
+        self.version = 0
+        self.responses = {}
+        self.changed = None
+        self.requests = 0
+        self.set_state({})
+
+    async def start(self):
+        # Serves on the current event loop
+        self.loop = asyncio.get_running_loop()
+        self.changed = asyncio.Event()
+        self.server = await asyncio.start_server(self.handle, self.host, self.port,
+                                                 limit=MAX_HEADER_BYTES)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.port
+
+    def publish(self, state):
+        if self.loop is None:
+            self.set_state(state)
+        else:
+            self.loop.call_soon_threadsafe(self.set_state, state)
+
+    def set_state(self, state):
+        self.version += 1
+        body = json.dumps(dict(state, version=self.version), ensure_ascii=False).encode("utf-8")
+        self.responses = {keep_alive: http_response("200 OK", body, keep_alive)
+                          for keep_alive in (True, False)}
+        if self.changed is not None:
+            # Wake every long-poll waiting on the previous version
+            self.changed.set()
+            self.changed = asyncio.Event()
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                parts = lines[0].split()
+                if len(parts) != 3:
+                    break
+                method, target, protocol = parts
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip().lower()
+                connection = headers.get("connection", "")
+                keep_alive = ("close" not in connection if protocol == "HTTP/1.1"
+                              else "keep-alive" in connection)
+
+                writer.write(await self.respond(method, target, keep_alive))
+                self.requests += 1
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            # Client gone, or the server is shutting down
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, method, target, keep_alive):
+        url = urlsplit(target)
+        if url.path not in ("/", "/status"):
+            return http_response("404 Not Found", b'{"error": "not found"}', keep_alive)
+        if method != "GET":
+            return http_response("405 Method Not Allowed", b'{"error": "GET only"}', keep_alive)
+
+        query = parse_qs(url.query)
+        try:
+            wait = int(query["wait"][0]) if "wait" in query else None
+            timeout = min(float(query.get("timeout", [WAIT_TIMEOUT])[0]), MAX_WAIT_TIMEOUT)
+        except ValueError:
+            return http_response("400 Bad Request", b'{"error": "bad query"}', keep_alive)
+        if wait == self.version:
+            try:
+                await asyncio.wait_for(self.changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.responses[keep_alive]
+
+
+class StatusProcess:
+    # The endpoint for the window: a StatusServer in a child process, fed
+    # one JSON line per change over a pipe. Clients never compete with the
+    # GUI thread for the GIL, and publish() is a single pipe write.
+    def __init__(self, port=0):
+        self.port = port
+        self.process = None
+
+    def start(self):
+        # Returns the bound port, or None when the child cannot listen.
+        # Waits for a whole interpreter to start; see start_async()
+        if getattr(sys, "frozen", False):
+            command = [sys.executable, "--status-child", str(self.port)]
+        else:
+            command = [sys.executable, TOOL_PATH, "--status-child", str(self.port)]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        line = self.process.stdout.readline().strip()
+        if not line.isdigit():
+            self.process.wait()
+            self.process = None
+            return None
+        self.port = int(line)
+        return self.port
+
+    def start_async(self, done):
+        # start() on a worker thread, then done(port or None) from that thread
+        threading.Thread(target=lambda: done(self.start()), name="status-start", daemon=True).start()
+
+    def publish(self, state):
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.write(json.dumps(state, ensure_ascii=False).encode("utf-8") + b"\n")
+            self.process.stdin.flush()
+        except OSError:
+            self.process = None
+
+    def stop(self):
+        if self.process is not None:
+            self.process.stdin.close()
+            self.process.wait(1)
+            self.process = None
+
+
+async def serve_pipe(port):
+    # Child side of StatusProcess: serves until stdin closes, which also
+    # happens when the window's process dies
+    server = StatusServer(port)
+    await server.start()
+    print(server.port, flush=True)
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+
+    def read():
+        for line in sys.stdin.buffer:
+            try:
+                server.publish(json.loads(line))
+            except ValueError:
+                continue
+        loop.call_soon_threadsafe(done.set_result, None)
+
+    threading.Thread(target=read, daemon=True).start()
+    await done
+
+
+def serve_child(port):
+    try:
+        asyncio.run(serve_pipe(port))
+    except OSError as error:
+        print(f"无法监听状态端口 {port}: {error}", file=sys.stderr)
+        return 1
+    return 0
@@ -0,0 +1,57 @@
+# -*- mode: python ; coding: utf-8 -*-
+# Slim profile: tool.spec without the Qt translations, the Qt plugins
+# tool.py never loads and unused standard library packages, see bundle.py.
+# Build with `pyinstaller tool_slim.spec`, then check the result with
+# `python bench.py bundle dist/tool_slim --expect-slim`.
+import os
+import sys
+
+sys.path.insert(0, SPECPATH)
+from bundle import SLIM_EXCLUDES, slim_toc
+
+icon = os.path.join(SPECPATH, 'logo.ico')
+
+a = Analysis(
+    ['tool.py'],
+    pathex=[],
+    binaries=[],
+    datas=[],
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=SLIM_EXCLUDES,
+    noarchive=False,
+    optimize=0,
+)
+a.binaries = slim_toc(a.binaries)
+a.datas = slim_toc(a.datas)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='tool',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=True,
+    console=False,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+    icon=[icon] if os.path.exists(icon) else None,
+)
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=True,
+    upx_exclude=[],
+    name='tool_slim',
+)
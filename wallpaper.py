@@ -0,0 +1,166 @@
+import os
+import sys
+import time
+from PyQt5.QtGui import QImage, QImageReader
+from PyQt5.QtCore import QObject, QProcess, Qt, QRect, QSize, QUrl, pyqtSignal
+
+# Width the wallpaper is decoded at; plenty for an average color
+SAMPLE_WIDTH = 256
+# How long a looked-up wallpaper path is trusted on Windows, where asking
+# again is a cheap call into user32
+PATH_TTL = 30.0
+GSETTINGS_KEY = ["org.gnome.desktop.background", "picture-uri"]
+
+
+def windows_wallpaper_path():
+    import ctypes
+    buffer = ctypes.create_unicode_buffer(260)
+    SPI_GETDESKWALLPAPER = 0x73
+    if ctypes.windll.user32.SystemParametersInfoW(SPI_GETDESKWALLPAPER, len(buffer), buffer, 0):
+        return buffer.value or None
+    return None
+
+
+def gsettings_path(line):
+    # Wallpaper file from a `gsettings get` line ("'file:///...'") or a
+    # `gsettings monitor` one ("picture-uri: 'file:///...'")
+    value = line.strip()
+    if value.startswith(GSETTINGS_KEY[1] + ":"):
+        value = value[len(GSETTINGS_KEY[1]) + 1:].strip()
+    return QUrl(value.strip("'")).toLocalFile() or None
+
+
+class WallpaperWatcher(QObject):
+    # Current desktop wallpaper file, or None while unknown. Outside Windows
+    # it comes from gsettings, run as a QProcess so the GUI thread never
+    # waits on it: one `get` for the start and a `monitor` that reports
+    # every change, after which `changed` is emitted. Without gsettings
+    # the path stays unknown.
+    changed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.path = None
+        self.path_checked = 0.0
+        self.processes = []
+        if sys.platform != "win32":
+            self.start("get")
+            self.start("monitor")
+
+    def start(self, command):
+        process = QProcess(self)
+        process.readyReadStandardOutput.connect(lambda: self.read(process))
+        process.start("gsettings", [command] + GSETTINGS_KEY)
+        self.processes.append(process)
+
+    def read(self, process):
+        lines = bytes(process.readAllStandardOutput()).decode(errors="replace").splitlines()
+        for line in lines:
+            if line.strip():
+                self.set_path(gsettings_path(line))
+
+    def set_path(self, path):
+        if path != self.path:
+            self.path = path
+            self.changed.emit()
+
+    def current_path(self):
+        if sys.platform == "win32":
+            now = time.monotonic()
+            if now - self.path_checked > PATH_TTL:
+                self.path = windows_wallpaper_path()
+                self.path_checked = now
+        return self.path
+
+    def stop(self):
+        for process in self.processes:
+            process.kill()
+            process.waitForFinished(1000)
+        self.processes = []
+
+
+def luminance(rgb):
+    # WCAG relative luminance
+    def channel(c):
+        c /= 255
+        return c / 12.92 if c <= 0.03928 else ((c + 0.055) / 1.055) ** 2.4
+    r, g, b = map(channel, rgb)
+    return 0.2126 * r + 0.7152 * g + 0.0722 * b
+
+
+def contrast_colors(rgb):
+    # Background matching the wallpaper, with black or white text,
+    # whichever contrasts more
+    lum = luminance(rgb)
+    if (lum + 0.05) / 0.05 > 1.05 / (lum + 0.05):
+        text_color = "0,0,0"
+    else:
+        text_color = "255,255,255"
+    return ",".join(map(str, rgb)), text_color
+
+
+class WallpaperSampler:
+    # Average wallpaper color under the window. The wallpaper is decoded
+    # once at a small size and the averaging is done by Qt's smooth scaling
+    # in C; results are cached by path, mtime and region. Without a fixed
+    # path the wallpaper is the desktop's, as known to `watcher`.
+    def __init__(self, path=None, watcher=None):
+        self.fixed_path = path
+        self.watcher = watcher if watcher is not None or path is not None else WallpaperWatcher()
+        self.image_key = None
+        self.image = None
+        self.colors = {}
+
+    def current_path(self):
+        if self.fixed_path is not None:
+            return self.fixed_path
+        return self.watcher.current_path()
+
+    def load(self, path):
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        key = (path, mtime)
+        if key != self.image_key:
+            reader = QImageReader(path)
+            size = reader.size()
+            if size.isValid() and size.width() > SAMPLE_WIDTH:
+                # Lets JPEG decode straight to the reduced size
+                reader.setScaledSize(QSize(SAMPLE_WIDTH, max(1, size.height() * SAMPLE_WIDTH // size.width())))
+            image = reader.read()
+            if image.isNull():
+                return None
+            if image.width() > SAMPLE_WIDTH:
+                image = image.scaledToWidth(SAMPLE_WIDTH, Qt.SmoothTransformation)
+            self.image = image.convertToFormat(QImage.Format_RGB32)
+            self.image_key = key
+            self.colors = {}
+        return self.image
+
+    def colors_for(self, window_rect, screen_rect):
+        # (bg_color, text_color) as "R,G,B" strings, or None without a wallpaper
+        path = self.current_path()
+        if not path:
+            return None
+        image = self.load(path)
+        if image is None or screen_rect.width() <= 0 or screen_rect.height() <= 0:
+            return None
+
+        # The wallpaper is assumed to be stretched over the whole screen
+        kx = image.width() / screen_rect.width()
+        ky = image.height() / screen_rect.height()
+        region = QRect(int((window_rect.x() - screen_rect.x()) * kx),
+                       int((window_rect.y() - screen_rect.y()) * ky),
+                       max(1, int(window_rect.width() * kx)),
+                       max(1, int(window_rect.height() * ky))).intersected(image.rect())
+        if region.isEmpty():
+            region = image.rect()
+
+        key = (region.x(), region.y(), region.width(), region.height())
+        colors = self.colors.get(key)
+        if colors is None:
+            pixel = image.copy(region).scaled(1, 1, Qt.IgnoreAspectRatio, Qt.SmoothTransformation).pixel(0, 0)
+            colors = contrast_colors(((pixel >> 16) & 0xff, (pixel >> 8) & 0xff, pixel & 0xff))
+            self.colors[key] = colors
+        return colors